@@ -4,66 +4,57 @@ sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
 
 import streamlit as st
 from components import css, header_template, search_result_template, user_template, bot_template, alert_bot_template, generate_interim_orders_info, generate_judgement_info
-from document_QnA import create_text_chunks, create_vector_store, create_chat_conversation
-import chromadb
+from document_QnA import create_text_chunks, get_or_create_vector_store, create_chat_conversation, has_document_chunks, stream_chat_answer
+from search_engine import hybrid_search_cases
+from case_records import parse_list_field
+from resources import current_directory, qna_config, get_doc_collection, get_chunk_collection, get_chunk_vector_store, get_qna_embedding_model, get_query_cache, get_keyword_index, get_search_collection, get_search_version, get_dict_of_options, get_filter_options
 import os
 import json
 import time
 import numpy as np
 import pandas as pd
 
-def load_config(filename):
-    with open(filename, 'r') as f:
-        config = json.load(f)
-    return config
-
-config = load_config('config.json')
-db_name = config['database']['chromadb']['database_name']
-
-# Get the absolute path of the current working directory
-current_directory = os.getcwd()
-
-client = chromadb.PersistentClient(path=f'{current_directory}/data')
-# sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=embedding_model)
-doc_collection = client.get_collection(name=db_name)
-
-all_documents = doc_collection.get()
-list_of_case_titles = [dictionary['case_title'] for dictionary in all_documents['metadatas']]
-list_of_doc_ids = all_documents['ids']
-dict_of_options = {list_of_case_titles[num]:list_of_doc_ids[num] for num in range(len(list_of_case_titles))}
+# client, collection and embedding models are cached across reruns and sessions
+doc_collection = get_doc_collection()
+dict_of_options = get_dict_of_options(doc_collection.count())
             
-# function to stream response message from the bot
-def stream_data(message):
-    try:
-        for word in message.split(" "):
-            yield word + " "
-            time.sleep(0.02)
-
-    except Exception as e:
-        print(f"Exception occured in stream_data: {e}")
-        return None
+# function to pass the tokens of an answer through while measuring the time to first token and the time of the turn
+def measure_answer_stream(tokens):
+    start_time = time.perf_counter()
+    first_token_time = None
+    for token in tokens:
+        if first_token_time is None:
+            first_token_time = time.perf_counter() - start_time
+        yield token
+    st.session_state.turn_latencies.append((first_token_time, time.perf_counter() - start_time))
+    print(f"Turn {len(st.session_state.turn_latencies)}: first token in {first_token_time or 0:.2f} s, answer in {st.session_state.turn_latencies[-1][1]:.2f} s")
 
 # function to generate user-to-bot chat
+# (the answer is streamed from the LLM as it is generated; only the latest turns are kept on screen,
+# the conversation memory folds the oldest turns into a summary on a token budget of its own)
 def generate_chat_from_user_question(user_question):
     try:        
         if st.session_state.conversation:
-            st.session_state.chat_history.append(user_question)
+            max_num_of_messages = 2 * qna_config['chat_display_turns']
+            if st.session_state.num_of_hidden_turns:
+                st.caption(f"{st.session_state.num_of_hidden_turns} earlier turns hidden.")
+            num_of_summarized_turns = st.session_state.conversation.memory.num_of_summarized_turns
+            if num_of_summarized_turns:
+                st.caption(f"{num_of_summarized_turns} earlier questions are summarized in the conversation memory.")
+            for i, message in enumerate(st.session_state.chat_history):
+                with st.chat_message("user" if i % 2 == 0 else "assistant"):
+                    st.markdown(message)
+
             question = user_question
-            response = st.session_state.conversation({'question': question + "Provide the answer in at least 60 words."})
-            answer = response['answer']
-            st.session_state.chat_history.append(answer)
-            print(st.session_state.chat_history)
+            with st.chat_message("user"):
+                st.markdown(question)
+            with st.chat_message("assistant"):
+                answer = st.write_stream(measure_answer_stream(stream_chat_answer(st.session_state.conversation, question + "Provide the answer in at least 60 words.")))
 
-            for i, message in enumerate(st.session_state.chat_history):
-                if i % 2 == 0:
-                    with st.chat_message("user"):
-                        st.write(message)
-                else:
-                    with st.chat_message("assistant"):
-                        if i == len(st.session_state.chat_history) - 1:
-                            st.write_stream(stream_data(message))
-                        else:
-                            st.write(message)
+            st.session_state.chat_history += [user_question, answer]
+            if len(st.session_state.chat_history) > max_num_of_messages:
+                st.session_state.num_of_hidden_turns += (len(st.session_state.chat_history) - max_num_of_messages) // 2
+                st.session_state.chat_history = st.session_state.chat_history[-max_num_of_messages:]
 
         else:
             st.write(alert_bot_template.replace("{{MSG}}", "Click the 'Process' button before starting the session."), unsafe_allow_html=True)
@@ -84,6 +75,55 @@ def get_doc_title_and_text(doc_id):
         print(f"Exception occured in get_doc_title_and_text: {e}")
         return None
 
+# function to render the search result of a case
+def render_search_result(doc_id, metadata):
+    result_template = search_result_template.replace("{{CASE_TITLE}}", metadata['case_title'])
+    result_template = result_template.replace("{{CASE_TYPE}}", metadata['case_type'])
+    result_template = result_template.replace("{{CNR_NUMBER}}", metadata['cnr_num'])
+    result_template = result_template.replace("{{INTERIM_ORDERS_URL}}", generate_interim_orders_info(parse_list_field(metadata['list_of_interim_order_urls'])))
+    result_template = result_template.replace("{{JUDGEMENT_URL}}", generate_judgement_info(metadata['judgement_url']))
+    result_template = result_template.replace("{{START_QNA_URL}}", doc_id)
+    return result_template
+
+# function to get the search filters selected by the user
+def get_search_filters():
+    filter_options = get_filter_options(doc_collection.count())
+    with st.expander("Filters"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            case_types = st.multiselect("Case type", filter_options['case_type'])
+        with col2:
+            case_statuses = st.multiselect("Case status", filter_options['case_status'])
+        with col3:
+            benches = st.multiselect("Bench", filter_options['bench'])
+        judge = st.selectbox("Judge", [''] + filter_options['judge'])
+        filing_years = None
+        if len(filter_options['filing_year']) > 1:
+            first_year, last_year = filter_options['filing_year'][0], filter_options['filing_year'][-1]
+            filing_years = st.slider("Filing year", first_year, last_year, (first_year, last_year))
+            if filing_years == (first_year, last_year):
+                filing_years = None
+    return {'case_type': case_types, 'case_status': case_statuses, 'bench': benches, 'judge': judge, 'filing_year': filing_years}
+
+# function to search the cases matching a query and render their search results
+# (repeated queries are served from the query cache until the collections change)
+def get_search_results(search_document, n_results=10, filters=None):
+    query_cache = get_query_cache()
+    version = get_search_version()
+    key = query_cache.create_key(search_document, n_results, json.dumps(filters, sort_keys=True))
+    search_results = query_cache.get(key, version)
+    if search_results is None:
+        result = hybrid_search_cases(doc_collection, get_search_collection(), get_keyword_index(), search_document, n_results=n_results, filters=filters)
+        if result is None:
+            return None
+        search_results = {
+            'ids': result['ids'],
+            'metadatas': result['metadatas'],
+            'html': [render_search_result(doc_id, metadata) for doc_id, metadata in zip(result['ids'], result['metadatas'])],
+        }
+        query_cache.put(key, version, search_results)
+    return search_results
+
 if __name__ == '__main__':
     try:
         st.set_page_config(page_title="Legal Docs Search & QnA", page_icon=":robot:")
@@ -93,6 +133,10 @@ if __name__ == '__main__':
             st.session_state.conversation = None
         if "chat_history" not in st.session_state:
             st.session_state.chat_history = []
+        if "num_of_hidden_turns" not in st.session_state:
+            st.session_state.num_of_hidden_turns = 0
+        if "turn_latencies" not in st.session_state:
+            st.session_state.turn_latencies = []
 
         col1, col2, col3 = st.columns(3)
         with col2:
@@ -123,9 +167,13 @@ if __name__ == '__main__':
             # if st.button("Process")
             if not st.session_state.conversation:
                 with st.spinner("Processing..."):
-                    text_chunks = create_text_chunks(doc_text)
-                    vector_store = create_vector_store(text_chunks)
-                    st.session_state.conversation = create_chat_conversation(vector_store)
+                    if has_document_chunks(get_chunk_collection(), doc_id):
+                        # reuse the chunk embeddings stored at ingest
+                        st.session_state.conversation = create_chat_conversation(get_chunk_vector_store(), doc_id)
+                    else:
+                        text_chunks = create_text_chunks(doc_text)
+                        vector_store = get_or_create_vector_store(doc_id, text_chunks, get_qna_embedding_model())
+                        st.session_state.conversation = create_chat_conversation(vector_store)
 
             user_question = st.chat_input("Ask a question about your document")
             if user_question:
@@ -137,21 +185,13 @@ if __name__ == '__main__':
             st.write("This tab demonstrates the 'Search and Find Documents' part of the application.")
 
             search_document = st.text_input("Search and find relevant documents:")
+            search_filters = get_search_filters()
             if search_document:
                 with st.spinner("Loading..."):
-                    result = doc_collection.query(query_texts=search_document, n_results=10)
-                    # st.write(result)
-
-                    for num in range(len(result['ids'][0])):
-                        metadata = result['metadatas'][0][num]
-                        doc_id = result['ids'][0][num]
-                        result_template = search_result_template.replace("{{CASE_TITLE}}", metadata['case_title'])
-                        result_template = result_template.replace("{{CASE_TYPE}}", metadata['case_type'])
-                        result_template = result_template.replace("{{CNR_NUMBER}}", metadata['cnr_num'])
-                        result_template = result_template.replace("{{INTERIM_ORDERS_URL}}", generate_interim_orders_info(eval(metadata['list_of_interim_order_urls'])))
-                        result_template = result_template.replace("{{JUDGEMENT_URL}}", generate_judgement_info(metadata['judgement_url']))
-                        result_template = result_template.replace("{{START_QNA_URL}}", doc_id)
-                        # print(result_template)
+                    search_results = get_search_results(search_document, n_results=10, filters=search_filters)
+                    # st.write(search_results)
+
+                    for result_template in (search_results['html'] if search_results else []):
                         st.write(result_template, unsafe_allow_html=True)
 
     except Exception as e:
@@ -0,0 +1,81 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import chromadb
+
+import document_search
+from compact_index import CompactIndex, build_compact_index, get_folder_size, compact_index_config
+
+# function to create clustered, normalized chunk embeddings standing in for a large corpus
+# (and queries close to random chunks, as a query usually paraphrases a passage of a case)
+def create_vectors(num_of_chunks, num_of_queries, dimension, num_of_clusters=200, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_of_clusters, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(num_of_clusters, size=num_of_chunks)] + 0.6 * rng.normal(size=(num_of_chunks, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.integers(num_of_chunks, size=num_of_queries)] + 0.02 * rng.normal(size=(num_of_queries, dimension)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+# function to get the exact top k chunks of every query by brute force
+def get_exact_neighbours(vectors, queries, k):
+    distances = (queries ** 2).sum(axis=1)[:, None] - 2 * queries @ vectors.T + (vectors ** 2).sum(axis=1)[None, :]
+    return np.argsort(distances, axis=1)[:, :k]
+
+# function to measure recall@k and latency of a search function returning chunk numbers
+def benchmark_search(search_function, queries, exact_neighbours, k):
+    latencies, recalls = [], []
+    for query, neighbours in zip(queries, exact_neighbours):
+        start_time = time.perf_counter()
+        chunk_numbers = search_function(query)
+        latencies.append(time.perf_counter() - start_time)
+        recalls.append(len(set(chunk_numbers[:k]) & set(neighbours.tolist())) / k)
+    return statistics.mean(recalls), statistics.mean(latencies) * 1000
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare recall@10, latency and memory of the chromadb HNSW index and the compact quantized indexes.")
+    parser.add_argument('--chunks', type=int, default=20000, help="number of chunk embeddings")
+    parser.add_argument('--queries', type=int, default=200, help="number of queries")
+    parser.add_argument('--dimension', type=int, default=384, help="dimension of the embeddings")
+    parser.add_argument('-k', type=int, default=10, help="number of results compared with the exact search")
+    args = parser.parse_args()
+
+    vectors, queries = create_vectors(args.chunks, args.queries, args.dimension)
+    exact_neighbours = get_exact_neighbours(vectors, queries, args.k)
+
+    with tempfile.TemporaryDirectory() as folder:
+        client = chromadb.PersistentClient(path=os.path.join(folder, 'data'))
+        chunk_collection = client.create_collection(name='benchmark_chunks', metadata=document_search.hnsw_config)
+        start_time = time.perf_counter()
+        for offset in range(0, args.chunks, 5000):
+            batch = range(offset, min(offset + 5000, args.chunks))
+            chunk_collection.add(ids=[str(i) for i in batch], embeddings=vectors[batch.start:batch.stop].tolist(), metadatas=[{'case_id': f'case_{i // 20}'} for i in batch])
+        print(f"chromadb collection of {args.chunks} chunks written in {time.perf_counter() - start_time:.1f} s")
+        hnsw_size = sum(get_folder_size(os.path.join(folder, 'data', name)) for name in os.listdir(os.path.join(folder, 'data')) if os.path.isdir(os.path.join(folder, 'data', name)))
+
+        print(f"{'index':<24} {'recall@' + str(args.k):>10} {'latency ms':>11} {'resident MB':>12} {'on disk MB':>11}")
+        recall, latency = benchmark_search(lambda query: [int(i) for i in chunk_collection.query(query_embeddings=[query.tolist()], n_results=args.k, include=[])['ids'][0]], queries, exact_neighbours, args.k)
+        print(f"{'chromadb hnsw float32':<24} {recall:>10.3f} {latency:>11.2f} {hnsw_size / 2**20:>12.1f} {hnsw_size / 2**20:>11.1f}")
+
+        for index_type in ('ivfpq', 'sq8'):
+            index_folder = os.path.join(folder, f'compact_{index_type}')
+            start_time = time.perf_counter()
+            index_description = build_compact_index(chunk_collection, index_folder, index_type, batch_size=5000)
+            build_time = time.perf_counter() - start_time
+            compact_index = CompactIndex.load(index_folder, chunk_collection, None)
+            resident_size = os.path.getsize(os.path.join(index_folder, 'index.faiss')) + os.path.getsize(os.path.join(index_folder, 'chunk_ids.offsets.npy')) + os.path.getsize(os.path.join(index_folder, 'case_ids.offsets.npy'))
+            chunk_numbers = {chunk_id: int(chunk_id) for chunk_id in compact_index.chunk_ids}
+            for rerank_factor in (1, compact_index_config['rerank_factor']):
+                compact_index.rerank_factor = rerank_factor
+                recall, latency = benchmark_search(lambda query: [chunk_numbers[compact_index.chunk_ids[i]] for i in compact_index.search(query, args.k)[0]], queries, exact_neighbours, args.k)
+                name = f"{index_description} rerank x{rerank_factor}"
+                print(f"{name:<24} {recall:>10.3f} {latency:>11.2f} {resident_size / 2**20:>12.1f} {get_folder_size(index_folder) / 2**20:>11.1f}")
+            print(f"  ({index_description} built in {build_time:.1f} s)")
@@ -0,0 +1,34 @@
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+# class of a local stand-in LLM answering every prompt with the same text at a fixed pace
+# (the first token arrives after first_token_latency seconds plus prompt_token_latency seconds per word of the
+# prompt, each following word after token_latency seconds)
+class FakeStreamingLLM(LLM):
+    answer: str
+    first_token_latency: float = 0.5
+    token_latency: float = 0.02
+    prompt_token_latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-streaming'
+
+    # function to answer a prompt after the whole answer has been generated
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        return ''.join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    # function to answer a prompt word by word as the words are generated
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        time.sleep(self.first_token_latency + self.prompt_token_latency * len(prompt.split()))
+        for index, word in enumerate(self.answer.split(' ')):
+            if index:
+                time.sleep(self.token_latency)
+            chunk = GenerationChunk(text=word + ' ')
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
@@ -0,0 +1,155 @@
+import ast
+import csv
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# folder of the repository (used to locate the recorded case details)
+repo_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# smallest valid pdf file served in place of interim orders and judgements
+pdf_content = b"""%PDF-1.4
+1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj
+2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj
+3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << >> >> endobj
+trailer << /Root 1 0 R >>
+%%EOF
+"""
+
+table_class = 'table table-striped table-bordered table-hover table-shadow'
+
+# function to read the recorded case details from the csv dataset
+def load_recorded_cases(csv_file=os.path.join(repo_directory, 'output.csv')):
+    with open(csv_file, 'r') as csvfile:
+        return [dict(row) for row in csv.DictReader(csvfile)]
+
+# function to get the token and lookup of a file url
+def get_token_lookup_from_url(file_url):
+    query = parse_qs(urlparse(file_url).query)
+    token = query.get('token', [''])[0].strip()
+    lookup = query.get('lookups', [''])[0].strip()
+    return token, lookup
+
+# function to render a table of the case details page
+def render_table(header, rows):
+    html = f'<table class="{table_class}"><tr><td class="table-header" colspan="4">{header}</td></tr>'
+    for row in rows:
+        html += '<tr>' + ''.join(f'<td>{cell}</td>' for cell in row) + '</tr>'
+    return html + '</table>'
+
+# function to render the case details page of a recorded case
+def render_case_details_page(case_details):
+    history_of_case_hearings = ast.literal_eval(case_details['History of Case Hearings']) if case_details['History of Case Hearings'] else []
+    list_of_interim_order_urls = ast.literal_eval(case_details['List of Interim Order URLs']) if case_details['List of Interim Order URLs'] else []
+
+    html = '<html><body>'
+    html += render_table('CASE DETAILS', [
+        ['Case Type', case_details['Case Type'], 'Case Status', case_details['Case Status']],
+        ['Filing Date', case_details['Filing Date'], 'Registration Date', case_details['Registration Date']],
+    ])
+    html += render_table('ACTS', [
+        ['Under Act(s)', 'Under Section(s)'],
+        [case_details['Under Act(s)'], case_details['Under Section(s)']],
+    ])
+    html += render_table('PETITIONER AND ADVOCATE', [[f'1) {case_details["Petitioner"]}']])
+    html += render_table('RESPONDENT AND ADVOCATES', [[f'1) {case_details["Respondent"]}']])
+    html += render_table('CASE STATUS', [
+        ['Coram', case_details['Judge']],
+        ['Bench', case_details['Bench']],
+    ])
+    hearing_headers = list(history_of_case_hearings[0].keys()) if history_of_case_hearings else ['#']
+    html += render_table('HISTORY OF CASE HEARING', [hearing_headers] + [list(hearing.values()) for hearing in history_of_case_hearings])
+    if case_details['Judgement URL']:
+        html += render_table('JUDGMENT', [['Judgement Date', case_details['Judgement Date'], '']])
+
+    for url in list_of_interim_order_urls:
+        token, lookup = get_token_lookup_from_url(url)
+        html += f'<button class="btn btn-primary"><a onclick="viewFile(\'{token}\',\'{lookup}\',\'root\');">VIEW</a></button>'
+    if case_details['Judgement URL']:
+        token, lookup = get_token_lookup_from_url(case_details['Judgement URL'])
+        html += f'<button class="btn btn-primary"><a onclick="viewJudgment(\'{token}\',\'{lookup}\',\'citation\');">VIEW JUDGMENT</a></button>'
+
+    return html + '</body></html>'
+
+# function to render the search results page of a list of cases
+def render_search_results_page(list_of_cases):
+    html = '<html><body><table class="table table-striped table-bordered table-hover">'
+    html += f'<thead><tr><th>Total No. of Cases : {len(list_of_cases)}</th></tr></thead><tbody>'
+    for index, case_details in enumerate(list_of_cases):
+        html += (f'<tr><td>{index+1}</td><td>{case_details["Case Number"]}</td><td>{case_details["Case Title"]}</td>'
+                 f'<td><button onclick="viewHistory(\'{case_details["CI Number"]}\',\'{case_details["CNR Number"]}\');">View</button></td></tr>')
+    return html + '<tr><td colspan="4"></td></tr></tbody></table></body></html>'
+
+# class of the stand-in server serving the recorded hckinfo pages
+# (pages are rendered once when the server is created, so that request handlers only write bytes)
+class HckinfoStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, recorded_cases, cases_per_year=10, latency=0.0, port=0):
+        super().__init__(('127.0.0.1', port), HckinfoStubHandler)
+        self.latency = latency
+        recorded_pages = [render_case_details_page(case_details).encode() for case_details in recorded_cases]
+        self.search_results_pages = {}
+        self.case_details_pages = {}
+        for year in range(2011, 2025):
+            list_of_cases = []
+            for index in range(cases_per_year):
+                case_details = dict(recorded_cases[index % len(recorded_cases)])
+                case_details['CNR Number'] = f"{case_details['CNR Number'][:-8]}{index+1:04d}{year}"
+                list_of_cases.append(case_details)
+                self.case_details_pages[case_details['CNR Number']] = recorded_pages[index % len(recorded_cases)]
+            self.search_results_pages[year] = render_search_results_page(list_of_cases).encode()
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/digicourt'
+
+    # function to start serving in a background thread
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+# class of the request handler of the stand-in server
+class HckinfoStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_content(self, content, content_type='text/html'):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(content)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.endswith('/Statuscasetype'):
+            self.send_content(b'<html><body><select id="case_type"><option>Select</option><option value="1">CMR</option></select></body></html>')
+        elif path.endswith('/fileview') or path.endswith('/fileviewcitation'):
+            token = parse_qs(urlparse(self.path).query).get('token', ['file'])[0].strip()
+            self.send_content(f'<html><body><object data="{self.server.base_url}/pdfs/{token}.pdf"></object></body></html>'.encode())
+        elif path.endswith('.pdf'):
+            self.send_content(pdf_content, 'application/pdf')
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+        if path.endswith('/Stausbycasetype'):
+            year = int(form['case_year'][0])
+            self.send_content(self.server.search_results_pages.get(year) or render_search_results_page([]).encode())
+        elif path.endswith('/Viewcasestatus'):
+            self.send_content(self.server.case_details_pages[form['case_no'][0]])
+        else:
+            self.send_error(404)
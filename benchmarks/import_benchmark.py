@@ -0,0 +1,58 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# modules imported when the app starts on the search page, and when the QnA path is first used
+startup_modules = ['search_engine', 'document_QnA', 'resources']
+qna_modules = ['qna_components', 'langchain.chains.conversational_retrieval.base', 'langchain_community.vectorstores']
+
+# function to import a module in a fresh interpreter and get the import time in seconds and the slowest imports
+# (from the cumulative times reported by python -X importtime, in microseconds)
+def measure_import(module, num_of_slowest):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    imports = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            self_time, cumulative_time, name = line[len('import time:'):].split('|')
+            if cumulative_time.strip().isdigit():
+                imports.append((int(cumulative_time), len(name) - len(name.lstrip()), name.strip()))
+
+    # the imports of a module are listed before it, indented one level deeper
+    module_index = max(index for index, (cumulative_time, depth, name) in enumerate(imports) if name == module)
+    total_time, module_depth, _ = imports[module_index]
+    direct_imports = []
+    for cumulative_time, depth, name in reversed(imports[:module_index]):
+        if depth <= module_depth:
+            break
+        if depth == module_depth + 2:
+            direct_imports.append((cumulative_time, name))
+    return total_time / 1e6, sorted(direct_imports, reverse=True)[:num_of_slowest]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the app modules to track startup regressions.")
+    parser.add_argument('--runs', type=int, default=3, help="number of fresh interpreters per module (the median is reported)")
+    parser.add_argument('--slowest', type=int, default=5, help="number of slowest direct imports listed per module")
+    parser.add_argument('--max-startup-seconds', type=float, default=None, help="exit with an error when a startup module imports slower than this")
+    args = parser.parse_args()
+
+    exceeded = False
+    for title, modules in (('startup', startup_modules), ('QnA path', qna_modules)):
+        print(f"{title}:")
+        for module in modules:
+            measurements = [measure_import(module, args.slowest) for _ in range(args.runs)]
+            if measurements[0][0] is None:
+                print(f"  {module:<50} not importable here ({measurements[0][1]})")
+                continue
+            total_time = statistics.median(total_time for total_time, slowest in measurements)
+            print(f"  {module:<50} {total_time:>6.2f} s")
+            for cumulative_time, name in measurements[-1][1]:
+                print(f"      {name:<46} {cumulative_time / 1e6:>6.2f} s")
+            if title == 'startup' and args.max_startup_seconds is not None and total_time > args.max_startup_seconds:
+                exceeded = True
+    sys.exit(1 if exceeded else 0)
@@ -0,0 +1,76 @@
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+from chromadb.utils import embedding_functions
+
+import document_search
+from ingest_state import IngestState
+from keyword_index import KeywordIndex
+
+# function to create a corpus of cases and document texts from the recorded cases
+# (each recorded case is repeated under new CNR numbers, its document is its intro and a number of judgement chunks)
+def create_corpus(num_of_cases, num_of_chunks_per_case):
+    recorded_cases = document_search.csv_to_list_of_dicts('output.csv')
+    corpus = []
+    for index in range(num_of_cases):
+        case_details = copy.deepcopy(recorded_cases[index % len(recorded_cases)])
+        case_details['CNR Number'] = f"{case_details['CNR Number']}{index:06d}"
+        case_intro = document_search.create_case_intro_from_case_details(case_details)
+        judgement_chunks = [f"Paragraph {i+1} of the judgement in {case_details['Case Title']} heard by {case_details['Judge']}." for i in range(num_of_chunks_per_case)]
+        corpus.append((case_details, case_intro + f"\n{25*'-'}\n".join(judgement_chunks)))
+    return corpus
+
+# function to load the corpus one case per add, the way the ingester wrote before the batch writer
+def load_case_by_case(client, corpus):
+    doc_collection = client.create_collection(name='cases_one_by_one')
+    chunk_collection = client.create_collection(name='chunks_one_by_one')
+    start_time = time.perf_counter()
+    for case_details, document_text in corpus:
+        doc_id = document_search.get_case_doc_id(case_details)
+        case_metadata = document_search.create_case_metadata(case_details)
+        doc_collection.add(ids=[doc_id], documents=[document_search.create_case_intro_from_case_details(case_details)], metadatas=[case_metadata])
+        document_search.add_chunks_to_collection(chunk_collection, [doc_id], [case_metadata], [document_text])
+    return doc_collection.count() + chunk_collection.count(), time.perf_counter() - start_time
+
+# function to load the corpus with the batch writer of the ingester
+def load_in_bulk(client, corpus, folder, chunk_batch_size, embedding_batch_size):
+    doc_collection = client.create_collection(name='cases_in_bulk', metadata=document_search.hnsw_config)
+    chunk_collection = client.create_collection(name='chunks_in_bulk', metadata=document_search.hnsw_config)
+    stage_stats = {name: document_search.StageStats(name) for name in ('embed', 'write')}
+    ingest_state = IngestState(os.path.join(folder, 'ingest_state.sqlite3'))
+    writer = document_search.CaseBatchWriter(doc_collection, chunk_collection, KeywordIndex(), ingest_state, embedding_functions.DefaultEmbeddingFunction(), chunk_batch_size, embedding_batch_size, stage_stats)
+    start_time = time.perf_counter()
+    for case_details, document_text in corpus:
+        writer.add(case_details, document_text, [])
+    writer.flush()
+    wall_time = time.perf_counter() - start_time
+    ingest_state.close()
+    return doc_collection.count() + chunk_collection.count(), wall_time
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare loading cases into the collections one by one and in bulk.")
+    parser.add_argument('--cases', type=int, default=200, help="number of cases in the corpus")
+    parser.add_argument('--chunks-per-case', type=int, default=20, help="number of judgement chunks of each case")
+    parser.add_argument('--chunk-batch-size', type=int, default=document_search.ingestion_config['chunk_batch_size'], help="number of chunks embedded and written at a time")
+    parser.add_argument('--embedding-batch-size', type=int, default=document_search.ingestion_config['embedding_batch_size'], help="number of texts passed to the embedding model in one call")
+    args = parser.parse_args()
+
+    corpus = create_corpus(args.cases, args.chunks_per_case)
+    with tempfile.TemporaryDirectory() as folder:
+        client = chromadb.PersistentClient(path=os.path.join(folder, 'data'))
+        # the embedding model is loaded before timing
+        embedding_functions.DefaultEmbeddingFunction()(['warm up'])
+
+        print(f"{'mode':<12} {'embeddings':>10} {'wall s':>8} {'embeddings/s':>13}")
+        for mode, load in (('one by one', lambda: load_case_by_case(client, corpus)),
+                           ('bulk', lambda: load_in_bulk(client, corpus, folder, args.chunk_batch_size, args.embedding_batch_size))):
+            num_of_embeddings, wall_time = load()
+            print(f"{mode:<12} {num_of_embeddings:>10} {wall_time:>8.2f} {num_of_embeddings / wall_time:>13.2f}")
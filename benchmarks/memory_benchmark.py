@@ -0,0 +1,62 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.memory import ConversationBufferMemory
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import document_search
+from document_QnA import create_text_chunks, create_chat_conversation, stream_chat_answer, qna_config
+from qna_components import estimate_num_of_tokens
+from fake_llm import FakeStreamingLLM
+
+questions = ["Who is the petitioner?", "Who are the judges?", "What is the status of the case?", "When was the judgement delivered?",
+             "What was decided at the last hearing?", "Which court heard the case?"]
+
+# function to measure the time to first token and the total time of a conversation turn
+def measure_turn(tokens):
+    start_time = time.perf_counter()
+    first_token_time = None
+    for token in tokens:
+        if first_token_time is None:
+            first_token_time = time.perf_counter() - start_time
+    return first_token_time, time.perf_counter() - start_time
+
+# function to run a scripted session and get the time to first token, total time and memory size of each turn
+def run_session(conversation, num_of_turns):
+    turns = []
+    for turn in range(num_of_turns):
+        first_token_time, total_time = measure_turn(stream_chat_answer(conversation, questions[turn % len(questions)]))
+        chat_history = conversation.memory.load_memory_variables({})[conversation.memory.memory_key]
+        turns.append((first_token_time, total_time, estimate_num_of_tokens(chat_history)))
+    return turns
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the per-turn latency of an unbounded and a bounded summarizing chat memory over a long session with a stand-in LLM.")
+    parser.add_argument('--turns', type=int, default=30, help="number of questions of the session")
+    parser.add_argument('--words', type=int, default=60, help="number of words of each answer")
+    parser.add_argument('--first-token-latency', type=float, default=0.05, help="seconds before the stand-in LLM starts reading the prompt")
+    parser.add_argument('--prompt-token-latency', type=float, default=0.0005, help="seconds the stand-in LLM spends on each word of the prompt")
+    args = parser.parse_args()
+
+    case_details = document_search.csv_to_list_of_dicts('output.csv')[0]
+    text_chunks = create_text_chunks(document_search.create_case_intro_from_case_details(case_details))
+    vector_store = FAISS.from_texts(texts=text_chunks, embedding=DeterministicFakeEmbedding(size=64))
+    answer = ' '.join(f"word{index}" for index in range(args.words))
+
+    print(f"{'memory':<10} {'turns':>9} {'first token s':>14} {'total s':>8} {'memory tokens':>14}")
+    for mode in ('buffer', 'summary'):
+        llm = FakeStreamingLLM(answer=answer, first_token_latency=args.first_token_latency, token_latency=0.0, prompt_token_latency=args.prompt_token_latency)
+        conversation = create_chat_conversation(vector_store, llm=llm)
+        if mode == 'buffer':
+            conversation.memory = ConversationBufferMemory(memory_key="chat_history", output_key="answer", return_messages=True)
+        turns = run_session(conversation, args.turns)
+        for label, window in (('1-5', turns[:5]), (f'{max(args.turns - 4, 1)}-{args.turns}', turns[-5:])):
+            print(f"{mode:<10} {label:>9} {statistics.mean(t[0] for t in window):>14.3f} {statistics.mean(t[1] for t in window):>8.3f} {statistics.mean(t[2] for t in window):>14.0f}")
+    print(f"summary memory limit: {qna_config['memory_max_tokens']} tokens")
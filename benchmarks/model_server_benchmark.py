@@ -0,0 +1,87 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chromadb.utils import embedding_functions
+
+from model_server import ModelClient
+
+queries = ["petition against the order of the district court", "bail application in a narcotics case", "writ petition for compensation",
+           "appeal against the acquittal of the accused", "dispute over the partition of the property", "admiralty suit for the arrest of the vessel"]
+
+# function to get the resident memory of a process in MB
+def get_rss_mb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+# function to embed queries one at a time from concurrent sessions (returns the queries embedded per second)
+def run_sessions(embed, num_of_sessions, num_of_queries):
+    def run_session(session):
+        for index in range(num_of_queries):
+            embed([f"{queries[(session + index) % len(queries)]} {session} {index}"])
+
+    threads = [threading.Thread(target=run_session, args=(session,)) for session in range(num_of_sessions)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return num_of_sessions * num_of_queries / (time.perf_counter() - start_time)
+
+# function to start a model server on a socket and wait until it answers
+def start_model_server(address, max_wait_ms):
+    process = subprocess.Popen([sys.executable, 'model_server.py', '--address', address, '--max-wait-ms', str(max_wait_ms)], stdout=subprocess.DEVNULL)
+    while True:
+        try:
+            client = ModelClient(address)
+            client.ping()
+            return process, client
+        except (FileNotFoundError, ConnectionRefusedError):
+            if process.poll() is not None:
+                raise RuntimeError("model server exited")
+            time.sleep(0.1)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare per-session embedding models with the shared, micro-batching model server.")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 16], help="numbers of concurrent sessions")
+    parser.add_argument('--queries', type=int, default=50, help="number of queries embedded by each session")
+    parser.add_argument('--max-wait-ms', type=float, nargs='+', default=[0, 5], help="batching windows of the model server")
+    args = parser.parse_args()
+
+    rss_before = get_rss_mb(os.getpid())
+    local_embedding_function = embedding_functions.DefaultEmbeddingFunction()
+    local_embedding_function(queries)
+    model_rss = get_rss_mb(os.getpid()) - rss_before
+
+    print(f"{'mode':<18} {'sessions':>8} {'queries/s':>10} {'mean batch':>11} {'RSS MB':>13}")
+    for num_of_sessions in args.sessions:
+        queries_per_second = run_sessions(local_embedding_function, num_of_sessions, args.queries)
+        # sessions share this process here, so the memory of a model per session is estimated, not measured
+        print(f"{'per session':<18} {num_of_sessions:>8} {queries_per_second:>10.1f} {1.0:>11.2f} {f'~{model_rss * num_of_sessions:.1f} (est.)':>13}")
+
+    for max_wait_ms in args.max_wait_ms:
+        with tempfile.TemporaryDirectory() as folder:
+            address = os.path.join(folder, 'models.sock')
+            process, client = start_model_server(address, max_wait_ms)
+            try:
+                client.embed('chroma', queries)
+                for num_of_sessions in args.sessions:
+                    stats_before = client.stats()['embed_chroma']
+                    queries_per_second = run_sessions(lambda texts: client.embed('chroma', texts), num_of_sessions, args.queries)
+                    stats = client.stats()['embed_chroma']
+                    mean_batch = (stats['items'] - stats_before['items']) / max(stats['batches'] - stats_before['batches'], 1)
+                    print(f"{f'server {max_wait_ms:g} ms':<18} {num_of_sessions:>8} {queries_per_second:>10.1f} {mean_batch:>11.2f} {get_rss_mb(process.pid):>13.1f}")
+            finally:
+                process.terminate()
+                process.wait()
+    print(f"(est.: the {model_rss:.1f} MB the model takes in this process times the number of sessions; server: RSS of the server process)")
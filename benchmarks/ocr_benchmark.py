@@ -0,0 +1,56 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# function to extract text the way the ingester did before the shared reader
+# (every page rasterized up front, one reader per page and pages re-encoded as JPEG)
+def extract_text_without_shared_reader(filename):
+    import easyocr
+    import pdf2image
+    text = ""
+    for image in pdf2image.convert_from_path(filename):
+        with BytesIO() as output:
+            image.save(output, format='JPEG')
+            image_data = output.getvalue()
+        reader = easyocr.Reader(['en'])
+        for line in reader.readtext(image_data):
+            text += line[1] + '\n'
+    return text
+
+# function to OCR a pdf file in this process and report pages per second and peak RSS
+def benchmark_ocr(filename, mode):
+    import pdf2image
+    import document_search
+
+    num_of_pages = pdf2image.pdfinfo_from_path(filename)['Pages']
+    start_time = time.perf_counter()
+    if mode == 'legacy':
+        extract_text_without_shared_reader(filename)
+    else:
+        document_search.extract_text_from_images_in_pdf_file(filename)
+    time_taken = time.perf_counter() - start_time
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"{mode:<8} {num_of_pages:>6} {time_taken:>9.2f} {num_of_pages / time_taken:>10.2f} {peak_rss_mb:>13.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the OCR of a scanned pdf file (e.g. a 50-page interim order).")
+    parser.add_argument('pdf_file', help="scanned pdf file to OCR")
+    parser.add_argument('--mode', choices=['legacy', 'streamed'], help="run a single mode in this process")
+    args = parser.parse_args()
+
+    pdf_file = os.path.abspath(args.pdf_file)
+    if args.mode:
+        benchmark_ocr(pdf_file, args.mode)
+    else:
+        # every mode runs in its own process so that peak RSS is measured separately
+        print(f"{'mode':<8} {'pages':>6} {'seconds':>9} {'pages/sec':>10} {'peak RSS MB':>13}")
+        for mode in ('legacy', 'streamed'):
+            subprocess.run([sys.executable, os.path.abspath(__file__), pdf_file, '--mode', mode], check=True)
@@ -0,0 +1,71 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+import main
+from hckinfo_stub import load_recorded_cases, render_case_details_page
+
+# function to extract the case details the way the scraper did before the table index
+# (html.parser over the whole page and one scan of all tables per header)
+def extract_case_details_without_index(parameters, html_content):
+    case_details_soup = BeautifulSoup(html_content, 'html.parser')
+    tables = case_details_soup.find_all('table', class_=main.case_details_table_class)
+
+    def find_table(header):
+        return [table for table in tables if table.find('td', class_='table-header').get_text(strip=True) == header]
+
+    judgement_table = find_table('JUDGMENT')
+    return main.combine_all_dicts([
+        parameters,
+        main.extract_details_from_case_details_table(find_table('CASE DETAILS')[0]),
+        main.extract_details_from_acts_table(find_table('ACTS')[0]),
+        main.extract_details_from_petitioner_table(find_table('PETITIONER AND ADVOCATE')[0]),
+        main.extract_details_from_respondent_table(find_table('RESPONDENT AND ADVOCATES')[0]),
+        main.extract_details_from_case_status_table(find_table('CASE STATUS')[0]),
+        main.extract_details_from_case_hearings_table(find_table('HISTORY OF CASE HEARING')[0]),
+        main.extract_details_from_judgement_table(judgement_table[0]) if judgement_table else {'Judgement Date': ''},
+    ])
+
+# function to extract the case details with the single-pass table index
+def extract_case_details_with_index(parameters, html_content):
+    case_details_soup = main.parse_case_details_page(html_content)
+    return main.extract_case_details(parameters, case_details_soup, [], '')
+
+# function to time an extraction function over all pages
+def benchmark_parser(extract_function, pages, rounds):
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        for html_content in pages:
+            extract_function({}, html_content)
+    return (time.perf_counter() - start_time) / (rounds * len(pages))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the parsing of case details pages.")
+    parser.add_argument('--pages-dir', help="folder of saved case details pages (*.html), rendered from output.csv when not given")
+    parser.add_argument('--rounds', type=int, default=20, help="number of times every page is parsed")
+    args = parser.parse_args()
+
+    if args.pages_dir:
+        pages = [open(filename, 'rb').read() for filename in sorted(glob.glob(os.path.join(args.pages_dir, '*.html')))]
+    else:
+        pages = [render_case_details_page(case_details).encode() for case_details in load_recorded_cases()]
+
+    sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+    try:
+        time_before = benchmark_parser(extract_case_details_without_index, pages, args.rounds)
+        time_after = benchmark_parser(extract_case_details_with_index, pages, args.rounds)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print(f"Pages: {len(pages)}, parser: {main.html_parser}")
+    print(f"Parse time per case before: {time_before * 1000:.2f} ms")
+    print(f"Parse time per case after:  {time_after * 1000:.2f} ms")
+    print(f"Speedup: {time_before / time_after:.2f}x")
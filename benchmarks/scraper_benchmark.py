@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from hckinfo_stub import HckinfoStubServer, load_recorded_cases
+
+# function to scrape all cases of a year from the stand-in server and measure cases per second
+# (every run starts in an empty folder with an empty pdf cache)
+def benchmark_scraper(server, year, num_of_workers):
+    with tempfile.TemporaryDirectory() as temp_directory:
+        os.chdir(temp_directory)
+        main.pdf_cache = None
+        return run_scraper(server, year, num_of_workers)
+
+def run_scraper(server, year, num_of_workers):
+    main.set_base_url(server.base_url)
+    main.configure_http_session(num_of_workers)
+    case_executor, download_executor = main.create_scraper_executors(num_of_workers)
+    try:
+        search_result_soup = main.get_case_results_casetype_year('1', year)
+        list_of_cases = main.extract_cinum_cnrnum_casenum_casetitle_list(search_result_soup)
+
+        start_time = time.perf_counter()
+        results = list(main.scrape_cases(('1', 'CMR'), year, list_of_cases, case_executor, download_executor))
+        time_taken = time.perf_counter() - start_time
+    finally:
+        case_executor.shutdown()
+        download_executor.shutdown()
+
+    num_of_cases = len([case_details for case_details, num_of_files in results if case_details])
+    return num_of_cases, time_taken
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against a local stand-in of the court website.")
+    parser.add_argument('--cases', type=int, default=40, help="number of cases served for the year")
+    parser.add_argument('--latency', type=float, default=0.05, help="simulated network latency per request in seconds")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16], help="worker pool sizes to compare")
+    args = parser.parse_args()
+
+    server = HckinfoStubServer(load_recorded_cases(), cases_per_year=args.cases, latency=args.latency).start()
+
+    sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+    try:
+        results = [(num_of_workers, *benchmark_scraper(server, 2011, num_of_workers)) for num_of_workers in args.workers]
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    server.shutdown()
+
+    print(f"{'workers':>8} {'cases':>6} {'seconds':>8} {'cases/sec':>10}")
+    for num_of_workers, num_of_cases, time_taken in results:
+        print(f"{num_of_workers:>8} {num_of_cases:>6} {time_taken:>8.2f} {num_of_cases / time_taken:>10.2f}")
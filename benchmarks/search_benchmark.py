@@ -0,0 +1,113 @@
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+
+import document_search
+import search_engine
+from keyword_index import KeywordIndex
+
+# function to load the case documents of the corpus
+# (the documents of the persistent collection ingested from output.csv, or the case intros of output.csv)
+def load_corpus(data_path):
+    try:
+        if not os.path.exists(os.path.join(data_path, 'chroma.sqlite3')):
+            raise FileNotFoundError(f"no chromadb database in {data_path}")
+        doc_collection = chromadb.PersistentClient(path=data_path).get_collection(name=document_search.db_name)
+        result = doc_collection.get(include=['documents', 'metadatas'])
+        if result['ids']:
+            return list(zip(result['ids'], result['documents'], result['metadatas']))
+    except Exception as e:
+        print(f"Collection not available ({e}), using the case intros of output.csv...")
+
+    corpus = []
+    for i, case_details in enumerate(document_search.csv_to_list_of_dicts('output.csv')):
+        corpus.append((f"id_{i+1}", document_search.create_case_intro_from_case_details(case_details), document_search.create_case_metadata(case_details)))
+    return corpus
+
+# function to create the queries of the benchmark with the case each query should find
+# (a window of words taken from random chunks of every document, including chunks deep in a judgement)
+def create_queries(corpus, queries_per_case, window, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for doc_id, document, metadata in corpus:
+        chunks = document_search.split_document_into_chunks(document)
+        for chunk in rng.sample(chunks, min(queries_per_case, len(chunks))):
+            words = chunk.split()
+            start = rng.randrange(max(1, len(words) - window))
+            queries.append((' '.join(words[start:start + window]), doc_id))
+    return queries
+
+# function to create the queries of the benchmark that are case identifiers (case numbers and CNR numbers)
+def create_identifier_queries(corpus):
+    queries = []
+    for doc_id, document, metadata in corpus:
+        for key, identifier in re.findall(r'^(CNR Number|Case Number): (.*)$', document, re.M):
+            queries.append((identifier, doc_id))
+    return queries
+
+# function to build the document-level and chunk-level collections and the keyword index of the corpus in memory
+def build_collections(corpus):
+    client = chromadb.EphemeralClient()
+    whole_doc_collection = client.create_collection(name='benchmark_documents')
+    case_collection = client.create_collection(name='benchmark_cases')
+    chunk_collection = client.create_collection(name='benchmark_chunks')
+    keyword_index = KeywordIndex()
+
+    for doc_id, document, metadata in corpus:
+        whole_doc_collection.add(ids=[doc_id], documents=[document], metadatas=[metadata])
+        case_collection.add(ids=[doc_id], documents=[document.split(25*'-')[0]], metadatas=[metadata])
+        document_search.add_chunks_to_collection(chunk_collection, [doc_id], [metadata], [document])
+        case_details = dict(re.findall(r'^(CNR Number|CI Number|Case Number): (.*)$', document, re.M))
+        keyword_index.add_document(doc_id, document, document_search.get_case_identifiers(case_details))
+    return whole_doc_collection, case_collection, chunk_collection, keyword_index
+
+# function to measure recall@k and query latency of a search function
+def benchmark_search(search_function, queries, k):
+    latencies = []
+    hits = 0
+    for query, doc_id in queries:
+        start_time = time.perf_counter()
+        list_of_doc_ids = search_function(query)
+        latencies.append(time.perf_counter() - start_time)
+        hits += doc_id in list_of_doc_ids[:k]
+    latencies.sort()
+    return hits / len(queries), statistics.mean(latencies), latencies[int(0.95 * (len(latencies) - 1))]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare recall and latency of whole-document and chunk-level search.")
+    parser.add_argument('--data-path', default='data', help="folder of the persistent chromadb collection")
+    parser.add_argument('--queries-per-case', type=int, default=5, help="number of queries taken from every case")
+    parser.add_argument('--window', type=int, default=12, help="number of words in a query")
+    parser.add_argument('-k', type=int, default=10, help="number of results checked for the expected case")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.data_path)
+    query_sets = {
+        'text': create_queries(corpus, args.queries_per_case, args.window),
+        'identifier': create_identifier_queries(corpus),
+    }
+    whole_doc_collection, case_collection, chunk_collection, keyword_index = build_collections(corpus)
+
+    search_functions = {
+        'document': lambda query: whole_doc_collection.query(query_texts=query, n_results=min(args.k, whole_doc_collection.count()))['ids'][0],
+        'chunk max': lambda query: search_engine.search_cases(case_collection, chunk_collection, query, args.k, 'max')['ids'],
+        'chunk sum': lambda query: search_engine.search_cases(case_collection, chunk_collection, query, args.k, 'sum')['ids'],
+        'hybrid': lambda query: search_engine.hybrid_search_cases(case_collection, chunk_collection, keyword_index, query, args.k)['ids'],
+    }
+
+    print(f"Cases: {len(corpus)}, chunks: {chunk_collection.count()}")
+    for query_set, queries in query_sets.items():
+        print(f"\n{len(queries)} {query_set} queries")
+        print(f"{'index':<10} {f'recall@{args.k}':>10} {'mean ms':>9} {'p95 ms':>8}")
+        for name, search_function in search_functions.items():
+            recall, mean_latency, p95_latency = benchmark_search(search_function, queries, args.k)
+            print(f"{name:<10} {recall:>10.3f} {mean_latency * 1000:>9.2f} {p95_latency * 1000:>8.2f}")
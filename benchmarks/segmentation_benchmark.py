@@ -0,0 +1,46 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import spacy
+
+import document_search
+
+# function to split documents into sentences the way the ingester did before the shared pipeline
+# (the full pipeline loaded and run for every document)
+def segment_documents_without_shared_pipeline(doc_contents):
+    list_of_sentences = []
+    for doc_content in doc_contents:
+        nlp = spacy.load(document_search.segmentation_config['model'])
+        list_of_sentences.append([sent.text.strip() for sent in nlp(doc_content).sents])
+    return list_of_sentences
+
+# function to time a segmentation function and return the number of characters segmented per second
+def benchmark_segmentation(segment_function, doc_contents):
+    start_time = time.perf_counter()
+    segment_function(doc_contents)
+    return sum(len(doc_content) for doc_content in doc_contents) / (time.perf_counter() - start_time)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the sentence segmentation of documents.")
+    parser.add_argument('--text-dir', help="folder of extracted document texts (*.txt), case intros of output.csv when not given")
+    parser.add_argument('--copies', type=int, default=20, help="number of times every text is segmented")
+    args = parser.parse_args()
+
+    if args.text_dir:
+        doc_contents = [open(filename, encoding='utf-8').read() for filename in sorted(glob.glob(os.path.join(args.text_dir, '*.txt')))]
+    else:
+        doc_contents = [document_search.create_case_intro_from_case_details(case_details) for case_details in document_search.csv_to_list_of_dicts('output.csv')]
+    doc_contents = doc_contents * args.copies
+
+    # load the shared pipeline before timing, as the ingester does once per process
+    document_search.get_sentence_segmenter()
+
+    print(f"Documents: {len(doc_contents)}, characters: {sum(len(doc_content) for doc_content in doc_contents)}")
+    print(f"Before: {benchmark_segmentation(segment_documents_without_shared_pipeline, doc_contents):,.0f} characters/sec")
+    print(f"After:  {benchmark_segmentation(document_search.segment_documents, doc_contents):,.0f} characters/sec")
@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import chromadb
+
+import document_search
+import search_engine
+from serving_snapshot import ServingSnapshot, export_snapshot
+
+# function to get the resident and proportional set sizes of a process in MB (shared pages are split between the
+# processes mapping them in the proportional set size)
+def get_memory_mb(pid):
+    memory = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key = line.split(':')[0]
+            if key in ('Rss', 'Pss'):
+                memory[key] = int(line.split()[1]) / 1024
+    return memory
+
+# class of a stand-in embedding function giving every query the same vector as a random chunk
+class RandomEmbeddingFunction:
+    def __init__(self, dimension):
+        self.rng = np.random.default_rng(1)
+        self.dimension = dimension
+
+    def __call__(self, input):
+        vectors = self.rng.normal(size=(len(input), self.dimension)).astype(np.float32)
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).tolist()
+
+# function to run a serving process: open the collections, answer queries, report its timings and memory
+def serve(mode, path, num_of_queries, dimension):
+    start_time = time.perf_counter()
+    embedding_function = RandomEmbeddingFunction(dimension)
+    if mode == 'chroma':
+        client = chromadb.PersistentClient(path=path)
+        doc_collection = client.get_collection(name='benchmark_cases', embedding_function=embedding_function)
+        chunk_collection = client.get_collection(name='benchmark_chunks', embedding_function=embedding_function)
+    else:
+        snapshot = ServingSnapshot(path, embedding_function)
+        doc_collection, chunk_collection = snapshot.doc_collection, snapshot.chunk_index
+    open_time = time.perf_counter() - start_time
+    search_engine.search_cases(doc_collection, chunk_collection, 'first query', 10)
+    first_query_time = time.perf_counter() - start_time
+    query_start_time = time.perf_counter()
+    for index in range(num_of_queries):
+        search_engine.search_cases(doc_collection, chunk_collection, f'query {index}', 10, filters={'case_status': 'DISPOSED'} if index % 2 else None)
+    query_time = (time.perf_counter() - query_start_time) / num_of_queries
+    print(json.dumps({'open': open_time, 'first_query': first_query_time, 'query': query_time, **get_memory_mb(os.getpid())}), flush=True)
+    sys.stdin.readline()
+
+# function to start serving processes and collect their reports once all of them are running
+def run_serving_processes(mode, path, num_of_processes, num_of_queries, dimension):
+    processes = [subprocess.Popen([sys.executable, __file__, '--serve', mode, '--path', path, '--queries', str(num_of_queries), '--dimension', str(dimension)],
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True) for _ in range(num_of_processes)]
+    reports = [json.loads(process.stdout.readline()) for process in processes]
+    # proportional set sizes are read while every process is still mapping the files
+    for report, process in zip(reports, processes):
+        report.update(get_memory_mb(process.pid))
+    for process in processes:
+        process.communicate('\n')
+    return reports
+
+# function to create a persistent collection of synthetic cases and chunks
+def create_collections(path, num_of_cases, chunks_per_case, dimension):
+    rng = np.random.default_rng(0)
+    client = chromadb.PersistentClient(path=path)
+    doc_collection = client.create_collection(name='benchmark_cases', metadata=document_search.hnsw_config)
+    chunk_collection = client.create_collection(name='benchmark_chunks', metadata=document_search.hnsw_config)
+    for offset in range(0, num_of_cases, 1000):
+        case_numbers = range(offset, min(offset + 1000, num_of_cases))
+        metadatas = [{'case_title': f'case {i}', 'case_type': 'WP(C)', 'case_status': 'DISPOSED' if i % 3 else 'PENDING', 'filing_year': 2000 + i % 24} for i in case_numbers]
+        doc_collection.add(ids=[f'case_{i}' for i in case_numbers], documents=[f'case {i} ' * 200 for i in case_numbers], metadatas=metadatas,
+                           embeddings=rng.normal(size=(len(case_numbers), dimension)).tolist())
+        chunk_metadatas = [{'case_id': f'case_{i}', **metadata} for i, metadata in zip(case_numbers, metadatas) for _ in range(chunks_per_case)]
+        vectors = rng.normal(size=(len(chunk_metadatas), dimension)).astype(np.float32)
+        chunk_collection.add(ids=[f'case_{i}_{j}' for i in case_numbers for j in range(chunks_per_case)], metadatas=chunk_metadatas,
+                             embeddings=(vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).tolist())
+    return doc_collection, chunk_collection
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the startup time and memory of serving processes opening chromadb or a serving snapshot.")
+    parser.add_argument('--cases', type=int, default=2000, help="number of synthetic cases")
+    parser.add_argument('--chunks-per-case', type=int, default=10, help="number of chunks of every case")
+    parser.add_argument('--dimension', type=int, default=384, help="dimension of the embeddings")
+    parser.add_argument('--processes', type=int, default=4, help="number of serving processes running side by side")
+    parser.add_argument('--queries', type=int, default=50, help="number of queries answered by every process")
+    parser.add_argument('--serve', choices=['chroma', 'snapshot'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.path, args.queries, args.dimension)
+        sys.exit()
+
+    with tempfile.TemporaryDirectory() as folder:
+        data_path = os.path.join(folder, 'data')
+        doc_collection, chunk_collection = create_collections(data_path, args.cases, args.chunks_per_case, args.dimension)
+        start_time = time.perf_counter()
+        name = export_snapshot(doc_collection, chunk_collection, os.path.join(folder, 'snapshots'), 'sq8')
+        print(f"snapshot of {args.cases} cases and {args.cases * args.chunks_per_case} chunks exported in {time.perf_counter() - start_time:.1f} s")
+
+        print(f"{'serving from':<10} {'open s':>7} {'first query s':>14} {'query ms':>9} {'RSS MB':>7} {'PSS MB':>7}")
+        for mode, path in (('chroma', data_path), ('snapshot', os.path.join(folder, 'snapshots', name))):
+            reports = run_serving_processes(mode, path, args.processes, args.queries, args.dimension)
+            mean = lambda key: sum(report[key] for report in reports) / len(reports)
+            print(f"{mode:<10} {mean('open'):>7.3f} {mean('first_query'):>14.3f} {mean('query') * 1000:>9.2f} {mean('Rss'):>7.1f} {mean('Pss'):>7.1f}")
@@ -0,0 +1,56 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import document_search
+from document_QnA import create_text_chunks, create_chat_conversation, stream_chat_answer
+from fake_llm import FakeStreamingLLM
+
+questions = ["Who is the petitioner?", "Who are the judges?", "What is the status of the case?", "When was the judgement delivered?"]
+
+# function to replay an answer word by word the way the app did before streaming
+def replay_answer(message):
+    for word in message.split(" "):
+        yield word + " "
+        time.sleep(0.02)
+
+# function to measure the time to first token and the total time of a conversation turn
+def measure_turn(tokens):
+    start_time = time.perf_counter()
+    first_token_time = None
+    for token in tokens:
+        if first_token_time is None:
+            first_token_time = time.perf_counter() - start_time
+    return first_token_time, time.perf_counter() - start_time
+
+# function to answer a question with the full answer replayed after it has been generated
+def answer_then_replay(conversation, question):
+    response = conversation({'question': question})
+    yield from replay_answer(response['answer'])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the latency of the replayed and the streamed chat answers with a stand-in LLM.")
+    parser.add_argument('--words', type=int, default=60, help="number of words of each answer")
+    parser.add_argument('--first-token-latency', type=float, default=0.5, help="seconds before the stand-in LLM emits its first token")
+    parser.add_argument('--token-latency', type=float, default=0.02, help="seconds between two tokens of the stand-in LLM")
+    args = parser.parse_args()
+
+    case_details = document_search.csv_to_list_of_dicts('output.csv')[0]
+    text_chunks = create_text_chunks(document_search.create_case_intro_from_case_details(case_details))
+    vector_store = FAISS.from_texts(texts=text_chunks, embedding=DeterministicFakeEmbedding(size=64))
+    answer = ' '.join(f"word{index}" for index in range(args.words))
+
+    print(f"{'mode':<10} {'first token s':>14} {'total s':>8}")
+    for mode, answer_question in (('replayed', answer_then_replay), ('streamed', stream_chat_answer)):
+        llm = FakeStreamingLLM(answer=answer, first_token_latency=args.first_token_latency, token_latency=args.token_latency)
+        conversation = create_chat_conversation(vector_store, llm=llm)
+        timings = [measure_turn(answer_question(conversation, question)) for question in questions]
+        print(f"{mode:<10} {statistics.mean(t[0] for t in timings):>14.3f} {statistics.mean(t[1] for t in timings):>8.3f}")
@@ -0,0 +1,83 @@
+import re
+from datetime import datetime
+
+# metadata fields of a case copied to each of its chunks so that filters narrow the chunk search too
+filter_fields = ('case_type', 'case_status', 'bench', 'filing_year', 'registration_year', 'judgement_year')
+
+judge_title_pattern = re.compile(r'^\s*(\d+\s*-\s*)?((HON\'?BLE|HONOURABLE)\s+)?(THE\s+)?((MR|MRS|MS|DR|SMT)(\.\s*|\s+))?((CHIEF\s+)?JUSTICE(\.\s*|\s+))?', re.I)
+
+# function to convert a date of the court website (dd-mm-yyyy) to an ISO date (yyyy-mm-dd)
+def parse_date(date_text):
+    for date_format in ('%d-%m-%Y', '%d/%m/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(str(date_text).strip(), date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+# function to split the judge field of a case into the names of its judges
+# (e.g. '4656-HONOURABLE MR.JUSTICE S.V.BHATTI,HONOURABLE MR.JUSTICE BASANT BALAJI' -> ['S.V.BHATTI', 'BASANT BALAJI'])
+def parse_judges(judge_text):
+    judges = []
+    for judge in str(judge_text or '').split(','):
+        name = ' '.join(judge_title_pattern.sub('', judge).split()).upper()
+        if name and name not in judges:
+            judges.append(name)
+    return judges
+
+# function to get the metadata key flagging the cases heard by a judge
+# (chromadb metadata values cannot be lists, so each judge of a case is stored as a boolean key)
+def get_judge_key(judge_name):
+    return 'judge_' + re.sub(r'[^a-z0-9]', '', judge_name.lower())
+
+# function to create the typed metadata of the case details of a case
+# (years are integers, dates are ISO strings and judges are normalized names; unknown values are left out)
+def create_typed_case_metadata(case_details):
+    metadata = {}
+    for key, field in (('case_num', 'Case Number'), ('case_status', 'Case Status'), ('bench', 'Bench')):
+        if case_details.get(field):
+            metadata[key] = str(case_details[field]).strip()
+    for key, field in (('filing', 'Filing Date'), ('registration', 'Registration Date'), ('judgement', 'Judgement Date')):
+        iso_date = parse_date(case_details.get(field, ''))
+        if iso_date:
+            metadata[f'{key}_date'] = iso_date
+            metadata[f'{key}_year'] = int(iso_date[:4])
+    judges = parse_judges(case_details.get('Judge'))
+    if judges:
+        metadata['judges'] = '; '.join(judges)
+        for judge in judges:
+            metadata[get_judge_key(judge)] = True
+    return metadata
+
+# function to get the part of the metadata of a case copied to its chunks
+def get_filter_metadata(case_metadata):
+    return {key: value for key, value in case_metadata.items() if key in filter_fields or key.startswith('judge_')}
+
+# function to convert search filters to a chromadb where clause
+# filters is a dictionary of:
+#   case_type, case_status, bench: a value or a list of values
+#   filing_year, registration_year, judgement_year: a year or a (from, to) range of years
+#   judge: the name of a judge
+def create_where_clause(filters):
+    conditions = []
+    for key, value in (filters or {}).items():
+        if value in (None, '', [], ()):
+            continue
+        if key == 'judge':
+            conditions.append({get_judge_key(' '.join(judge_title_pattern.sub('', value).split())): True})
+        elif key.endswith('_year'):
+            if isinstance(value, (list, tuple)):
+                year_from, year_to = value
+                if year_from is not None:
+                    conditions.append({key: {'$gte': int(year_from)}})
+                if year_to is not None:
+                    conditions.append({key: {'$lte': int(year_to)}})
+            else:
+                conditions.append({key: int(value)})
+        elif isinstance(value, (list, tuple)):
+            conditions.append({key: {'$in': list(value)}})
+        else:
+            conditions.append({key: value})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {'$and': conditions}
@@ -0,0 +1,72 @@
+import os
+import ast
+import argparse
+import csv
+import json
+
+# fields of the case details holding lists (hearings are rows of dictionaries, interim orders are urls)
+list_fields = ('History of Case Hearings', 'List of Interim Order URLs')
+
+# function to parse a list field of the csv dataset or of a stored metadata value
+# (values are JSON arrays or Python reprs written by the scraper; parsed safely without eval)
+def parse_list_field(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if not value:
+        return []
+    try:
+        parsed_value = json.loads(value)
+    except ValueError:
+        try:
+            parsed_value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+    return list(parsed_value) if isinstance(parsed_value, (list, tuple)) else []
+
+# function to convert a row of the csv dataset into a typed case record
+def parse_case_details(row):
+    case_details = dict(row)
+    for field in list_fields:
+        if field in case_details:
+            case_details[field] = parse_list_field(case_details[field])
+    return case_details
+
+# function to get the path of the case records converted from a csv dataset
+def get_case_records_path(csv_file):
+    return os.path.splitext(csv_file)[0] + '.jsonl'
+
+# function to write case records as JSON lines (written to a temporary file first so readers never see a partial file)
+def write_case_records(list_of_case_details, records_file):
+    temp_records_file = f'{records_file}.{os.getpid()}.tmp'
+    with open(temp_records_file, 'w', encoding='utf-8') as f:
+        for case_details in list_of_case_details:
+            f.write(json.dumps(case_details, ensure_ascii=False) + '\n')
+    os.replace(temp_records_file, records_file)
+
+# function to read case records written as JSON lines
+def read_case_records(records_file):
+    with open(records_file, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# function to convert a csv dataset into case records
+def convert_csv_to_case_records(csv_file, records_file=None):
+    with open(csv_file, 'r', newline='') as csvfile:
+        list_of_case_details = [parse_case_details(row) for row in csv.DictReader(csvfile)]
+    write_case_records(list_of_case_details, records_file or get_case_records_path(csv_file))
+    return list_of_case_details
+
+# function to load the court cases of a csv dataset as case records
+# (the csv dataset is converted once, the records are reused until the csv dataset changes)
+def load_court_cases(csv_file):
+    records_file = get_case_records_path(csv_file)
+    if os.path.exists(records_file) and os.path.getmtime(records_file) >= os.path.getmtime(csv_file):
+        return read_case_records(records_file)
+    return convert_csv_to_case_records(csv_file, records_file)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert a csv dataset of scraped court cases into case records.")
+    parser.add_argument('csv_file', nargs='?', default='output.csv', help="csv dataset of the scraped court cases")
+    args = parser.parse_args()
+
+    list_of_case_details = convert_csv_to_case_records(args.csv_file)
+    print(f"{len(list_of_case_details)} case records written to {get_case_records_path(args.csv_file)}")
@@ -0,0 +1,111 @@
+import os
+import json
+import sqlite3
+import threading
+
+# class to persist the progress of a crawl so that a restarted crawl skips the work already done
+# (keyed by case type, year and CNR number)
+class CheckpointStore:
+    def __init__(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS years (
+                case_type TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                PRIMARY KEY (case_type, year)
+            );
+            CREATE TABLE IF NOT EXISTS cases (
+                case_type TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                cnr_num TEXT NOT NULL,
+                case_details TEXT,
+                pdfs_done INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (case_type, year, cnr_num)
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                case_type TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                cnr_num TEXT NOT NULL,
+                url TEXT NOT NULL,
+                file_path TEXT,
+                PRIMARY KEY (case_type, year, cnr_num, url)
+            );
+        """)
+
+    # function to forget all progress of a case type (used when a crawl is started afresh)
+    def reset(self, case_type):
+        with self.lock:
+            for table in ('years', 'cases', 'files'):
+                self.connection.execute(f"DELETE FROM {table} WHERE case_type = ?", (case_type,))
+
+    # function to check if all cases of a year have been crawled
+    def is_year_done(self, case_type, year):
+        with self.lock:
+            row = self.connection.execute("SELECT 1 FROM years WHERE case_type = ? AND year = ?", (case_type, year)).fetchone()
+        return row is not None
+
+    # function to mark all cases of a year as crawled
+    def mark_year_done(self, case_type, year):
+        with self.lock:
+            self.connection.execute("INSERT OR IGNORE INTO years VALUES (?, ?)", (case_type, year))
+
+    # function to get the set of CNR numbers of the completed cases of a year (for O(1) skips)
+    def get_done_cnr_nums(self, case_type, year):
+        with self.lock:
+            rows = self.connection.execute("SELECT cnr_num FROM cases WHERE case_type = ? AND year = ? AND pdfs_done = 1", (case_type, year)).fetchall()
+        return {row[0] for row in rows}
+
+    # function to get the case details saved for a case, if its case details page was already crawled
+    def get_case_details(self, case_type, year, cnr_num):
+        with self.lock:
+            row = self.connection.execute("SELECT case_details FROM cases WHERE case_type = ? AND year = ? AND cnr_num = ?", (case_type, year, cnr_num)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    # function to save the case details extracted from the case details page of a case
+    def save_case_details(self, case_type, year, cnr_num, case_details):
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO cases (case_type, year, cnr_num, case_details) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (case_type, year, cnr_num) DO UPDATE SET case_details = excluded.case_details",
+                (case_type, year, cnr_num, json.dumps(case_details)))
+
+    # function to mark all pdf files of a case as downloaded
+    def mark_pdfs_done(self, case_type, year, cnr_num):
+        with self.lock:
+            self.connection.execute("UPDATE cases SET pdfs_done = 1 WHERE case_type = ? AND year = ? AND cnr_num = ?", (case_type, year, cnr_num))
+
+    # function to get the already downloaded pdf files of a case as a dictionary of url and file path
+    def get_downloaded_files(self, case_type, year, cnr_num):
+        with self.lock:
+            rows = self.connection.execute("SELECT url, file_path FROM files WHERE case_type = ? AND year = ? AND cnr_num = ?", (case_type, year, cnr_num)).fetchall()
+        return dict(rows)
+
+    # function to record a downloaded pdf file of a case
+    def mark_file_downloaded(self, case_type, year, cnr_num, url, file_path):
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", (case_type, year, cnr_num, url, file_path))
+
+    # function to iterate over the case details of all completed cases of a case type in crawl order
+    # (rows are fetched in batches so that memory stays flat on large crawls)
+    def iter_case_details(self, case_type, batch_size=500):
+        last_rowid = 0
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    "SELECT rowid, case_details FROM cases WHERE case_type = ? AND pdfs_done = 1 AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (case_type, last_rowid, batch_size)).fetchall()
+            if not rows:
+                return
+            for rowid, case_details in rows:
+                yield json.loads(case_details)
+            last_rowid = rows[-1][0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
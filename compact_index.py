@@ -0,0 +1,186 @@
+import os
+import json
+import shutil
+import argparse
+
+import numpy as np
+import faiss
+import chromadb
+
+from string_table import StringTable, write_string_table
+from query_cache import get_collection_version
+
+def load_config(filename):
+    with open(filename, 'r') as f:
+        config = json.load(f)
+    return config
+
+config = load_config('config.json')
+chunk_collection_name = config['database']['chromadb']['chunk_collection_name']
+compact_index_config = config['search']['compact_index']
+
+# product quantization trains 256 centroids per sub-vector, faiss wants about 39 training vectors per centroid
+min_num_of_vectors_for_pq = 39 * 256
+
+# function to get the faiss index description of the compact index of a number of vectors
+# ('ivfpq': inverted lists over product quantized codes, 'sq8': int8 scalar quantized codes searched exhaustively;
+# small collections fall back to 'sq8' as they are too small to train the product quantizer)
+def get_index_description(index_type, num_of_vectors, dimension):
+    if index_type == 'ivfpq' and num_of_vectors >= min_num_of_vectors_for_pq:
+        nlist = max(1, min(compact_index_config['nlist'], num_of_vectors // 39))
+        pq_m = compact_index_config['pq_m']
+        while dimension % pq_m:
+            pq_m -= 1
+        return f"IVF{nlist},PQ{pq_m}"
+    return "SQ8"
+
+# class of a compact, read-only copy of the chunk collection used for vector search
+# (the quantized codes are searched in memory and the best candidates are re-ranked with the exact
+# vectors, which stay on disk in a memory-mapped file; it is queried like the chunk collection)
+class CompactIndex:
+    def __init__(self, index, vectors, chunk_ids, case_ids, chunk_collection, embedding_function, nprobe, rerank_factor):
+        self.index = index
+        self.vectors = vectors
+        self.chunk_ids = chunk_ids
+        self.case_ids = case_ids
+        self.chunk_numbers = None
+        self.chunk_collection = chunk_collection
+        self.embedding_function = embedding_function
+        self.nprobe = nprobe
+        self.rerank_factor = rerank_factor
+        # version of the chunk collection the index was built from (None if it was not recorded)
+        self.collection_version = None
+
+    def count(self):
+        return len(self.chunk_ids)
+
+    # function to get the numbers of the chunks best matching a query vector with their squared L2 distances
+    # (chunk_numbers limits the search to a subset of the chunks)
+    def search(self, query_vector, n_results, chunk_numbers=None):
+        query_vector = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        num_of_candidates = min(n_results * self.rerank_factor, self.count() if chunk_numbers is None else len(chunk_numbers))
+        if num_of_candidates <= 0:
+            return [], []
+        if isinstance(self.index, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(nprobe=self.nprobe)
+        else:
+            params = faiss.SearchParameters()
+        if chunk_numbers is not None:
+            selector = faiss.IDSelectorBatch(np.asarray(chunk_numbers, dtype=np.int64))
+            params.sel = selector
+        _, candidates = self.index.search(query_vector, num_of_candidates, params=params)
+        candidates = np.sort(candidates[0][candidates[0] >= 0])
+
+        # exact re-rank of the candidates (sorted so that the memory-mapped vectors are read in file order)
+        distances = ((self.vectors[candidates] - query_vector) ** 2).sum(axis=1)
+        best = np.argsort(distances, kind='stable')[:n_results]
+        return candidates[best].tolist(), distances[best].tolist()
+
+    # function to get the numbers of the chunks passing a chroma where clause (resolved by the chunk collection)
+    def get_chunk_numbers(self, where):
+        if self.chunk_numbers is None:
+            self.chunk_numbers = {chunk_id: chunk_number for chunk_number, chunk_id in enumerate(self.chunk_ids)}
+        chunk_ids = self.chunk_collection.get(where=where, include=[])['ids']
+        return [self.chunk_numbers[chunk_id] for chunk_id in chunk_ids if chunk_id in self.chunk_numbers]
+
+    # function to query the index like a chroma collection (ids, metadatas with the case id, and distances)
+    def query(self, query_texts, n_results=10, where=None, include=('metadatas', 'distances')):
+        if isinstance(query_texts, str):
+            query_texts = [query_texts]
+        chunk_numbers = self.get_chunk_numbers(where) if where else None
+        result = {'ids': [], 'metadatas': [], 'distances': []}
+        for query_vector in self.embedding_function(query_texts):
+            best_chunk_numbers, distances = self.search(query_vector, n_results, chunk_numbers)
+            result['ids'].append([self.chunk_ids[chunk_number] for chunk_number in best_chunk_numbers])
+            result['metadatas'].append([{'case_id': self.case_ids[chunk_number]} for chunk_number in best_chunk_numbers])
+            result['distances'].append(distances)
+        return result
+
+    # function to load the index saved in a folder (the exact vectors and the ids are memory-mapped, not read,
+    # and so is the quantized index when faiss supports it)
+    @classmethod
+    def load(cls, folder, chunk_collection, embedding_function):
+        index_path = os.path.join(folder, 'index.faiss')
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            index = faiss.read_index(index_path)
+        vectors = np.load(os.path.join(folder, 'vectors.npy'), mmap_mode='r')
+        chunk_ids = StringTable(os.path.join(folder, 'chunk_ids'))
+        case_ids = StringTable(os.path.join(folder, 'case_ids'))
+        compact_index = cls(index, vectors, chunk_ids, case_ids, chunk_collection, embedding_function,
+                            compact_index_config['nprobe'], compact_index_config['rerank_factor'])
+        version_path = os.path.join(folder, 'version.json')
+        if os.path.exists(version_path):
+            with open(version_path, 'r') as f:
+                compact_index.collection_version = tuple(json.load(f))
+        return compact_index
+
+# function to build the compact index of the chunk collection in a folder
+# (the embeddings are copied in batches to a memory-mapped file, the quantizer is trained on a sample of them;
+# the index is written to a temporary folder first so that readers never see a partial index;
+# collection_version, taken before the chunks are read, is recorded so that readers can tell a stale index)
+def build_compact_index(chunk_collection, folder, index_type=None, batch_size=1000, collection_version=None):
+    try:
+        index_type = index_type or compact_index_config['index_type']
+        num_of_chunks = chunk_collection.count()
+        if not num_of_chunks:
+            print("No chunks to index...")
+            return None
+        temp_folder = f'{folder}.{os.getpid()}.tmp'
+        shutil.rmtree(temp_folder, ignore_errors=True)
+        os.makedirs(temp_folder)
+
+        vectors, chunk_ids, case_ids = None, [], []
+        for offset in range(0, num_of_chunks, batch_size):
+            result = chunk_collection.get(offset=offset, limit=batch_size, include=['embeddings', 'metadatas'])
+            embeddings = np.asarray(result['embeddings'], dtype=np.float32)
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(os.path.join(temp_folder, 'vectors.npy'), mode='w+', dtype=np.float32, shape=(num_of_chunks, embeddings.shape[1]))
+            vectors[len(chunk_ids):len(chunk_ids) + len(embeddings)] = embeddings
+            chunk_ids += result['ids']
+            case_ids += [metadata['case_id'] for metadata in result['metadatas']]
+        vectors.flush()
+
+        index_description = get_index_description(index_type, num_of_chunks, vectors.shape[1])
+        print(f"Building a {index_description} index of {num_of_chunks} chunks...")
+        index = faiss.index_factory(vectors.shape[1], index_description, faiss.METRIC_L2)
+        sample = np.random.default_rng(0).choice(num_of_chunks, min(num_of_chunks, compact_index_config['max_training_vectors']), replace=False)
+        index.train(np.ascontiguousarray(vectors[np.sort(sample)]))
+        for offset in range(0, num_of_chunks, batch_size):
+            index.add(np.ascontiguousarray(vectors[offset:offset + batch_size]))
+        faiss.write_index(index, os.path.join(temp_folder, 'index.faiss'))
+        write_string_table(chunk_ids, os.path.join(temp_folder, 'chunk_ids'))
+        write_string_table(case_ids, os.path.join(temp_folder, 'case_ids'))
+        if collection_version is not None:
+            with open(os.path.join(temp_folder, 'version.json'), 'w') as f:
+                json.dump(list(collection_version), f)
+        del vectors
+
+        old_folder = f'{folder}.{os.getpid()}.old'
+        if os.path.exists(folder):
+            os.replace(folder, old_folder)
+        os.replace(temp_folder, folder)
+        shutil.rmtree(old_folder, ignore_errors=True)
+        return index_description
+
+    except Exception as e:
+        print(f"Exception occured in build_compact_index: {e}")
+        return None
+
+# function to get the size in bytes of the files of a folder
+def get_folder_size(folder):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the compact, quantized vector index of the chunk collection.")
+    parser.add_argument('--index-type', choices=['ivfpq', 'sq8'], default=compact_index_config['index_type'], help="quantization of the index")
+    parser.add_argument('--batch-size', type=int, default=1000, help="number of chunks read from the collection at a time")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path="data")
+    chunk_collection = client.get_collection(name=chunk_collection_name)
+    index_description = build_compact_index(chunk_collection, compact_index_config['path'], args.index_type, args.batch_size, get_collection_version([chunk_collection], "data"))
+    if index_description:
+        index_size = os.path.getsize(os.path.join(compact_index_config['path'], 'index.faiss'))
+        print(f"{index_description} index of {chunk_collection.count()} chunks: {index_size / 2**20:.1f} MB resident, exact vectors on disk: {os.path.getsize(os.path.join(compact_index_config['path'], 'vectors.npy')) / 2**20:.1f} MB")
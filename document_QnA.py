@@ -1,19 +1,18 @@
-import chromadb
-from chromadb.utils import embedding_functions
 import os
 from dotenv import load_dotenv
 import json
+import re
+import time
+import pickle
+import shutil
+import hashlib
+import tempfile
+import importlib
 
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.memory import ConversationBufferMemory
-from langchain.chains.conversational_retrieval.base import ConversationalRetrievalChain
-from langchain_community.llms.ollama import Ollama
-from langchain_huggingface import HuggingFaceEndpoint
-from langchain_google_genai import ChatGoogleGenerativeAI
-import google.generativeai as genai
+# langchain, faiss and the LLM integrations are imported by the functions using them, so that importing this
+# module (and starting the app on the search page) does not load them
+
+from model_server import model_server_config, ServedEmbeddingFunction
 
 load_dotenv()
 openai_api_key = os.getenv('OPENAI_API_KEY')
@@ -27,11 +26,16 @@ def load_config(filename):
 
 config = load_config('config.json')
 db_name = config['database']['chromadb']['database_name']
+chunk_collection_name = config['database']['chromadb']['chunk_collection_name']
 huggingfacehub_embedding_model = config['embedding_models']['faiss_embedding_model']
 openai_model = config['llm_models']['openai_model']
 ollama_model = config['llm_models']['ollama_model']
+qna_index_cache_foldername = config['folders']['qna_index_cache']
+qna_config = config['qna']
+llm_config = config['llm_models']
 
-genai.configure(api_key=google_api_key)
+# age in seconds after which a temp folder of the vector store cache is taken as left behind by a failed save
+stale_temp_folder_age = 3600
 
 # print(f"OpenAI key: {openai_api_key}")
 
@@ -80,11 +84,26 @@ def create_text_chunks(text):
     print(f"Exception occured in create_text_chunks: {e}")
     return None
 
+# function to create the embedding model of the vector store in this process
+def create_local_embedding_model():
+  from langchain_huggingface import HuggingFaceEmbeddings
+  # from langchain_openai import OpenAIEmbeddings
+  # return OpenAIEmbeddings()
+  return HuggingFaceEmbeddings(model_name=huggingfacehub_embedding_model, model_kwargs={"device": "cpu"}, encode_kwargs={"normalize_embeddings": True})
+
+# function to create the embedding model of the vector store (served by the model server whenever it is running)
+def create_embedding_model():
+  if model_server_config['enabled']:
+    from qna_components import ChromaEmbeddings
+    return ChromaEmbeddings(ServedEmbeddingFunction('qna', lambda: create_local_embedding_model().embed_documents))
+  return create_local_embedding_model()
+
 # function to create vector store
-def create_vector_store(text_chunks):
+def create_vector_store(text_chunks, embedding=None):
   try:
-    # embedding = OpenAIEmbeddings()
-    embedding = HuggingFaceEmbeddings(model_name=huggingfacehub_embedding_model, model_kwargs={"device": "cpu"}, encode_kwargs={"normalize_embeddings": True})
+    from langchain_community.vectorstores import FAISS
+    if embedding is None:
+      embedding = create_embedding_model()
     vector_store = FAISS.from_texts(texts=text_chunks, embedding=embedding)
     return vector_store
 
@@ -92,17 +111,131 @@ def create_vector_store(text_chunks):
     print(f"Exception occured in create_vector_store: {e}")
     return None
 
+# function to get the folder of the cached vector store of a document
+# (named after a hash of the chunks and the embedding model so that a changed document is embedded again)
+def get_vector_store_cache_folder(doc_id, text_chunks):
+  content_hash = hashlib.sha256(huggingfacehub_embedding_model.encode())
+  for chunk in text_chunks:
+    content_hash.update(b'\0' + chunk.encode())
+  document_foldername = re.sub(r'[^A-Za-z0-9_.-]', '_', doc_id)
+  return os.path.join(qna_index_cache_foldername, document_foldername, content_hash.hexdigest()[:32])
+
+# function to save a vector store to its cache folder (replacing older versions of the document)
+def save_vector_store(vector_store, folder):
+  temp_folder = None
+  try:
+    document_folder = os.path.dirname(folder)
+    os.makedirs(document_folder, exist_ok=True)
+    temp_folder = tempfile.mkdtemp(dir=document_folder, prefix='.tmp_')
+    vector_store.save_local(temp_folder)
+    # older versions of the vector store are removed; temp folders are in-flight saves of other sessions,
+    # removed only when left behind long ago by a save that never finished
+    for name in os.listdir(document_folder):
+      path = os.path.join(document_folder, name)
+      if path in (temp_folder, folder):
+        continue
+      try:
+        if name.startswith('.tmp_') and time.time() - os.path.getmtime(path) < stale_temp_folder_age:
+          continue
+      except FileNotFoundError:
+        # renamed into place by the session that saved it in the meantime
+        continue
+      shutil.rmtree(path, ignore_errors=True)
+    if os.path.exists(folder):
+      shutil.rmtree(temp_folder, ignore_errors=True)
+    else:
+      os.replace(temp_folder, folder)
+
+  except Exception as e:
+    print(f"Exception occured in save_vector_store: {e}")
+    if temp_folder:
+      shutil.rmtree(temp_folder, ignore_errors=True)
+    return None
+
+# function to load a vector store from its cache folder (the index is memory-mapped when possible)
+def load_vector_store(folder, embedding):
+  try:
+    import faiss
+    from langchain_community.vectorstores import FAISS
+    index_path = os.path.join(folder, 'index.faiss')
+    try:
+      index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+      index = faiss.read_index(index_path)
+    # the docstore was pickled by save_vector_store
+    with open(os.path.join(folder, 'index.pkl'), 'rb') as f:
+      docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embedding, index, docstore, index_to_docstore_id)
+
+  except Exception as e:
+    print(f"Exception occured in load_vector_store: {e}")
+    return None
+
+# function to get the vector store of a document from the cache, creating and caching it on a miss
+def get_or_create_vector_store(doc_id, text_chunks, embedding=None):
+  try:
+    if embedding is None:
+      embedding = create_embedding_model()
+    folder = get_vector_store_cache_folder(doc_id, text_chunks)
+    if os.path.exists(os.path.join(folder, 'index.faiss')):
+      vector_store = load_vector_store(folder, embedding)
+      if vector_store:
+        return vector_store
+
+    vector_store = create_vector_store(text_chunks, embedding)
+    if vector_store:
+      save_vector_store(vector_store, folder)
+    return vector_store
+
+  except Exception as e:
+    print(f"Exception occured in get_or_create_vector_store: {e}")
+    return None
+
+# function to create the vector store over the chunk collection written at ingest
+# (questions are embedded with the embedding function of the collection)
+def create_chunk_vector_store(client, embedding_function):
+  try:
+    from langchain_community.vectorstores import Chroma
+    from qna_components import ChromaEmbeddings
+    return Chroma(collection_name=chunk_collection_name, embedding_function=ChromaEmbeddings(embedding_function), client=client)
+
+  except Exception as e:
+    print(f"Exception occured in create_chunk_vector_store: {e}")
+    return None
+
+# function to check if the chunks of a document are in the chunk collection
+def has_document_chunks(chunk_collection, doc_id):
+  try:
+    return len(chunk_collection.get(where={"case_id": doc_id}, limit=1, include=[])['ids']) > 0
+
+  except Exception as e:
+    print(f"Exception occured in has_document_chunks: {e}")
+    return False
+
+# function to create the LLM of the chatbot with a backend of the config (the configured backend by default)
+# (a backend names the module and class of its langchain integration, the arguments of the class, and the
+# arguments read from environment variables; the integration is imported only when its LLM is created)
+def create_llm(backend_name=None):
+  backend = llm_config['backends'][backend_name or llm_config['backend']]
+  llm_class = getattr(importlib.import_module(backend['module']), backend['class'])
+  kwargs = dict(backend.get('kwargs', {}))
+  for argument, variable in backend.get('env_kwargs', {}).items():
+    if os.getenv(variable):
+      kwargs[argument] = os.getenv(variable)
+  return llm_class(**kwargs)
+
 # function to create conversation of the chatbot
-def create_chat_conversation(vector_store):
+# (retrieval is limited to the chunks of the document when a document id is given)
+def create_chat_conversation(vector_store, doc_id=None, llm=None):
   try:
-    memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-    # llm = ChatOpenAI(model_name=openai_model)
-    # llm = Ollama(model=ollama_model, temperature=0.6)
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro-latest")
-    # llm = HuggingFaceEndpoint(repo_id="microsoft/Phi-3-small-128k-instruct", huggingfacehub_api_token=huggingfacehub_api_token)
+    from langchain.chains.conversational_retrieval.base import ConversationalRetrievalChain
+    from qna_components import BoundedSummaryMemory
+    search_kwargs = {"filter": {"case_id": doc_id}} if doc_id else {}
+    llm = llm or create_llm()
+    memory = BoundedSummaryMemory(llm=llm, max_token_limit=qna_config['memory_max_tokens'], memory_key="chat_history", output_key="answer", return_messages=True)
     conversation_chain = ConversationalRetrievalChain.from_llm(
           llm=llm,
-          retriever=vector_store.as_retriever(search_type = "mmr"),
+          retriever=vector_store.as_retriever(search_type = "mmr", search_kwargs=search_kwargs),
           memory=memory)
     return conversation_chain
 
@@ -110,7 +243,42 @@ def create_chat_conversation(vector_store):
     print(f"Exception occured in create_chat_conversation: {e}")
     return None
 
+# function to stream the answer of the conversation to a question token by token
+# (runs the steps of the conversation chain itself so that the answer is streamed from the LLM as it is
+# generated: the question is condensed with the chat history, the chunks are retrieved, and the answer
+# prompt is streamed; the question and answer are saved to the memory of the conversation at the end)
+def stream_chat_answer(conversation, question):
+  try:
+    from langchain_core.messages import get_buffer_string
+    from langchain_core.prompts import format_document
+    chat_history = conversation.memory.load_memory_variables({})[conversation.memory.memory_key]
+    standalone_question = question
+    if chat_history:
+      get_chat_history = conversation.get_chat_history or get_buffer_string
+      question_generator = conversation.question_generator
+      standalone_question = question_generator.invoke({"question": question, "chat_history": get_chat_history(chat_history)})[question_generator.output_key]
+    docs = conversation.retriever.invoke(standalone_question)
+
+    combine_docs_chain = conversation.combine_docs_chain
+    context = combine_docs_chain.document_separator.join(format_document(doc, combine_docs_chain.document_prompt) for doc in docs)
+    prompt = combine_docs_chain.llm_chain.prompt.format_prompt(**{
+      combine_docs_chain.document_variable_name: context,
+      "question": standalone_question if conversation.rephrase_question else question,
+    })
+
+    answer = ""
+    for chunk in combine_docs_chain.llm_chain.llm.stream(prompt):
+      token = chunk if isinstance(chunk, str) else chunk.content
+      answer += token
+      yield token
+    conversation.memory.save_context({"question": question}, {"answer": answer})
+
+  except Exception as e:
+    print(f"Exception occured in stream_chat_answer: {e}")
+    return None
+
 if __name__ == '__main__':
+    import chromadb
     client = chromadb.PersistentClient(path='data')
     # sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=chromadb_embedding_model)
     doc_collection = client.get_collection(name=db_name)
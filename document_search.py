@@ -1,4 +1,3 @@
-import csv
 import os
 import shutil
 from dotenv import load_dotenv
@@ -8,10 +7,18 @@ import PyPDF2
 import pdf2image
 import easyocr
 from datetime import datetime
-from io import BytesIO
+import numpy as np
 import time
 import json
+import hashlib
 import spacy
+import argparse
+import re
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 import chromadb
 from chromadb.utils import embedding_functions
@@ -20,6 +27,13 @@ from langchain_openai import OpenAI
 from langchain_community.llms.ollama import Ollama
 
 from enums import DocumentType
+from pdf_cache import PdfCache, get_cached_file_hash
+from keyword_index import KeywordIndex, load_or_create_keyword_index
+from case_metadata import create_typed_case_metadata, get_filter_metadata
+from case_records import load_court_cases
+from ingest_state import IngestState
+from model_server import call_served_model, get_collection_embedding_function
+from serving_snapshot import export_snapshot, snapshot_config
 
 load_dotenv()
 openai_api_key = os.getenv('OPENAI_API_KEY')
@@ -31,20 +45,28 @@ def load_config(filename):
 
 config = load_config('config.json')
 db_name = config['database']['chromadb']['database_name']
+chunk_collection_name = config['database']['chromadb']['chunk_collection_name']
 openai_model = config['llm_models']['openai_model']
 ollama_model = config['llm_models']['ollama_model']
 pdf_downloads_foldername = config['folders']['pdf_downloads']
+pdf_cache_foldername = config['pdf_cache']['folder']
+pdf_cache_max_size_mb = config['pdf_cache']['max_size_mb']
+ingestion_config = config['ingestion']
+ocr_config = config['ocr']
+segmentation_config = config['segmentation']
+keyword_index_path = config['search']['keyword_index_path']
+ingest_state_path = ingestion_config['state_path']
+hnsw_config = config['database']['chromadb']['hnsw']
+
+# tag marking the start of a page in the text extracted from a pdf file
+page_tag_template = '[Page {}]'
+page_tag_pattern = re.compile(r'\[Page (\d+)\]')
 
 # function to convert a CSV file to a list of dictionaries
+# (list fields are parsed once into typed case records, which are reused until the CSV file changes)
 def csv_to_list_of_dicts(csv_file):
     try:
-        data = []
-        with open(csv_file, "r") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                data.append(dict(row))  # Convert each row dictionary to a dictionary
-    
-        return data
+        return load_court_cases(csv_file)
     except Exception as e:
         print(f"Exception occured in csv_to_list_of_dicts: {e}")
         return None
@@ -79,51 +101,45 @@ def get_pdf_file_content(pdf_url):
         print(f"Exception occured in get_pdf_file_content: {e}")
         return None
 
-# function to write pdf file
-def write_pdf_file(folderpath, url):
+# function to download a pdf file (returns the pdf url and the content of the pdf file)
+def fetch_pdf_file(url):
+    pdf_url = get_pdf_file_url(url)
+    pdf_content = get_pdf_file_content(pdf_url) if pdf_url else None
+    return pdf_url, pdf_content
+
+# pdf cache shared with the scraper so that every pdf file is downloaded at most once
+pdf_cache = None
+pdf_cache_lock = threading.Lock()
+
+# function to get the pdf cache (opened on first use, by the first of the download threads asking for it)
+def get_pdf_cache():
+    global pdf_cache
+    with pdf_cache_lock:
+        if pdf_cache is None:
+            pdf_cache = PdfCache(pdf_cache_foldername, pdf_cache_max_size_mb)
+        return pdf_cache
+
+# function to get the path of a pdf file through the pdf cache
+# (refresh downloads the file again even if it is cached)
+def get_pdf_file(url, refresh=False):
     try:
         if len(url) > 0:
-            pdf_url = get_pdf_file_url(url)
-            # print("Entering function...")
-            if pdf_url:
-                # print("Entered function...")
-                pdf_content = get_pdf_file_content(pdf_url)
-                if pdf_content:
-                    filename = pdf_url.split('/')[-1]
-                    file_path = os.path.join(folderpath, filename)
-                    
-                    # write the content of the response to a PDF file
-                    with open(file_path, 'wb') as f:
-                        f.write(pdf_content)
-                        # print(file_path, "is written.")
-
-                    # print("Type of path:", type(file_path))
-                    return file_path
+            file_path, pdf_url = get_pdf_cache().get_pdf_file(url, fetch_pdf_file, refresh)
+            # print(file_path, "is cached.")
+            return file_path
     except Exception as e:
-        print(f"Exception occured in write_pdf_file: {e}")
+        print(f"Exception occured in get_pdf_file: {e}")
         return None
     
 # function to download and save files
-def save_pdf_files(case_type, cnr_num, interim_order_url_list, judgement_url):
+def save_pdf_files(case_type, cnr_num, interim_order_url_list, judgement_url, refresh=False):
     try:
-        root_directory = os.path.join(os.getcwd(), pdf_downloads_foldername)
-        case_folder_name = str(case_type) + '_' + str(cnr_num)
-        # print('case_folder_name:', case_folder_name)
-        interim_orders_folder_name = 'interim orders'
-
-        interim_orders_folderpath = root_directory + '/' + case_folder_name + '/' + interim_orders_folder_name
-        judgement_folderpath = root_directory + '/' + case_folder_name
-
-        # create folders if does not exist
-        if not os.path.exists(interim_orders_folderpath):
-            os.makedirs(interim_orders_folderpath)
-
         interim_order_filename_list = []
         for url in interim_order_url_list:
-            interim_order_filename_list.append(write_pdf_file(interim_orders_folderpath, url))
+            interim_order_filename_list.append(get_pdf_file(url, refresh))
             # print('interim_order_filename_list', interim_order_filename_list)
 
-        judgement_filename = write_pdf_file(judgement_folderpath, judgement_url)
+        judgement_filename = get_pdf_file(judgement_url, refresh)
         print("PDF files saved successfully...")
 
         return interim_order_filename_list, judgement_filename
@@ -147,6 +163,7 @@ def delete_downloads_folder():
         return None
     
 # function to create document intro from case details
+# (case details are typed case records, list fields are already lists)
 def create_case_intro_from_case_details(case_details):
     try:
         formatted_text = ""
@@ -155,29 +172,21 @@ def create_case_intro_from_case_details(case_details):
                 key = "URL of Judgement in PDF file format"
             if key == 'List of Interim Order URLs':
                 key = "List of URLs of Interim Order in PDF file format"
-            if isinstance(value, str):
-                try:
-                    parsed_value = eval(value)
-                    if isinstance(parsed_value, list):
-                        formatted_text += f"{key}"
-                        if parsed_value:
-                            for i, value_inside_list in enumerate(parsed_value):
-                                formatted_text += f"\n{i+1}.\t"
-                                if isinstance(value_inside_list, dict):
-                                    value_inside_list.pop('#')
-                                    formatted_text += "\n\t".join([f"{key}: {value}" for key, value in value_inside_list.items()])
-                                else:
-                                    formatted_text += value_inside_list
-                            formatted_text += "\n"
+            if isinstance(value, list):
+                formatted_text += f"{key}"
+                if value:
+                    for i, value_inside_list in enumerate(value):
+                        formatted_text += f"\n{i+1}.\t"
+                        if isinstance(value_inside_list, dict):
+                            formatted_text += "\n\t".join([f"{key}: {value}" for key, value in value_inside_list.items() if key != '#'])
                         else:
-                            formatted_text += f": Records not available\n"
-                    else:
-                        formatted_text += f"{key}: {parsed_value}\n"
-                except (SyntaxError, NameError, KeyError, TypeError, KeyError) as e:
-                    if not value:
-                        value = "Information not available"
-                    formatted_text += f"{key}: {value}\n"
+                            formatted_text += value_inside_list
+                    formatted_text += "\n"
+                else:
+                    formatted_text += f": Records not available\n"
             else:
+                if not value:
+                    value = "Information not available"
                 formatted_text += f"{key}: {value}\n"
             if key in ('Case Status', 'Bench', 'History of Case Hearings', 'URL of Judgement in PDF file format'):
                 formatted_text += f"{25*'-'}\n"
@@ -188,80 +197,155 @@ def create_case_intro_from_case_details(case_details):
         print(f"Exception occured in create_case_intro_from_case_details: {e}")
         return None
     
-# function to count number of images in a pdf file
-def get_num_of_images_in_pdf_file(filename):
+# function to count number of large (scanned page sized) images in a page of a pdf file
+def get_num_of_images_in_pdf_page(page):
     try:
         image_count = 0
 
-        with open(filename, 'rb') as pdf_file:
-            pdf_reader = PyPDF2.PdfReader(filename)
-
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                x_objects = page['/Resources']['/XObject']
-
-                for obj_key in x_objects.keys():
-                    obj = x_objects[obj_key]
-                    
-                    # Check if the object is an image
-                    if obj.get('/Subtype') == '/Image':
-                        width = obj.get('/Width')
-                        height = obj.get('/Height')
-                        
-                        # Check if image dimensions meet the criteria
-                        if width and height and width > 1240 and height > 1754:
-                            image_count += 1
+        resources = page.get('/Resources') or {}
+        x_objects = resources.get('/XObject') or {}
+
+        for obj_key in x_objects.keys():
+            obj = x_objects[obj_key].get_object()
+            
+            # Check if the object is an image
+            if obj.get('/Subtype') == '/Image':
+                width = obj.get('/Width')
+                height = obj.get('/Height')
+                
+                # Check if image dimensions meet the criteria
+                if width and height and width > 1240 and height > 1754:
+                    image_count += 1
 
         return image_count
 
+    except Exception as e:
+        print(f"Exception occured in get_num_of_images_in_pdf_page: {e}")
+        return 0
+
+# function to count number of images in a pdf file
+def get_num_of_images_in_pdf_file(filename):
+    try:
+        pdf_reader = PyPDF2.PdfReader(filename)
+        return sum(get_num_of_images_in_pdf_page(page) for page in pdf_reader.pages)
+
     except Exception as e:
         print(f"Exception occured in get_num_of_images_in_pdf_file: {e}")
         return None
 
+# easyocr reader loaded once per process and reused for every page
+ocr_reader = None
+
+# function to get the easyocr reader of the process (loaded on first use)
+def get_ocr_reader():
+    global ocr_reader
+    if ocr_reader is None:
+        ocr_reader = easyocr.Reader(ocr_config['languages'])
+    return ocr_reader
+
+# function to extract text from images in the given pages of a pdf file (returns a dictionary of page number and text)
+# (pages are rasterized a few at a time so that only a small batch of images is held in memory, and are read
+# by the model server when it is running)
+def extract_text_from_images_in_pdf_pages(filename, page_numbers):
+    try:
+        page_texts = {}
+        page_batch_size = ocr_config['page_batch_size']
+
+        # group the pages into runs of consecutive pages of at most page_batch_size pages
+        page_batches = []
+        for page_number in sorted(page_numbers):
+            if page_batches and page_number == page_batches[-1][-1] + 1 and len(page_batches[-1]) < page_batch_size:
+                page_batches[-1].append(page_number)
+            else:
+                page_batches.append([page_number])
+
+        for page_batch in page_batches:
+            images = [np.asarray(image) for image in pdf2image.convert_from_path(filename, first_page=page_batch[0], last_page=page_batch[-1])]
+            served_page_texts = call_served_model('ocr', images)
+            if served_page_texts is not None:
+                page_texts.update(zip(page_batch, served_page_texts))
+                continue
+            for page_number, image in zip(page_batch, images):
+                result = get_ocr_reader().readtext(image)
+                page_texts[page_number] = ''.join(line[1] + '\n' for line in result)
+        return page_texts
+
+    except Exception as e:
+        print(f"Exception occured in extract_text_from_images_in_pdf_pages: {e}")
+        return None
+
 # function to extract text from images in a pdf file
 def extract_text_from_images_in_pdf_file(filename):
     try:
-        text = ""
-        images = pdf2image.convert_from_path(filename)
-        for image in images:
-            # print(f"Type of image: {type(image)}")
-            image_data = b''
-            with BytesIO() as output:
-                image.save(output, format='JPEG')
-                image_data = output.getvalue()
-                # print(f"Type of image_data: {type(image_data)}")
-            reader = easyocr.Reader(['en'])
-            result = reader.readtext(image_data)
-
-            for line in result:
-                text += line[1] + '\n'
-        return text
+        num_of_pages = pdf2image.pdfinfo_from_path(filename)['Pages']
+        page_texts = extract_text_from_images_in_pdf_pages(filename, range(1, num_of_pages + 1))
+        return ''.join(page_texts[page_number] for page_number in sorted(page_texts))
 
     except Exception as e:
         print(f"Exception occured in extract_text_from_images_in_pdf_file: {e}")
         return None
 
-# function to extract from a pdf file
-def extract_text_from_pdf_file(filename):
+# function to extract the text of every page of a pdf file (returns a list of page number and text)
+# (pages with a usable text layer are read directly, only image-only pages are sent to OCR)
+def extract_pages_from_pdf_file(filename):
     try:
         pdf_reader = PyPDF2.PdfReader(filename)
 
-        num_of_images = get_num_of_images_in_pdf_file(filename)
-        print(f"Image Count: {num_of_images}")
-        if num_of_images > 0:
-            text = extract_text_from_images_in_pdf_file(filename)
-        else:
-            text = ""
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text()
-        
-        return text
+        page_texts = {}
+        pages_to_ocr = []
+        for page_number, page in enumerate(pdf_reader.pages, start=1):
+            text = page.extract_text() or ''
+            if len(text.strip()) < ocr_config['min_text_chars_per_page'] and get_num_of_images_in_pdf_page(page) > 0:
+                pages_to_ocr.append(page_number)
+            page_texts[page_number] = text
+
+        print(f"Pages: {len(page_texts)}, pages sent to OCR: {len(pages_to_ocr)}")
+        if pages_to_ocr:
+            page_texts.update(extract_text_from_images_in_pdf_pages(filename, pages_to_ocr) or {})
+
+        return sorted(page_texts.items())
+
+    except Exception as e:
+        print(f"Exception occured in extract_pages_from_pdf_file: {e}")
+        return None
+
+# function to extract from a pdf file
+# (every page is preceded by a page tag so that chunks keep their page numbers)
+def extract_text_from_pdf_file(filename):
+    try:
+        pages = extract_pages_from_pdf_file(filename)
+        return ''.join(f"{page_tag_template.format(page_number)}\n{text}\n" for page_number, text in pages)
 
     except Exception as e:
         print(f"Exception occured in extract_text_from_pdf_file: {e}")
         return None
 
+# spacy pipeline loaded once per process and reused for every document
+nlp = None
+
+# function to get the spacy pipeline used to split documents into sentences (loaded on first use)
+# (only the components needed for sentence boundaries are loaded, or just the rule-based sentencizer)
+def get_sentence_segmenter():
+    global nlp
+    if nlp is None:
+        if segmentation_config['use_sentencizer']:
+            nlp = spacy.blank('en')
+            nlp.add_pipe('sentencizer')
+        else:
+            nlp = spacy.load(segmentation_config['model'], exclude=['tagger', 'attribute_ruler', 'lemmatizer', 'ner'])
+        nlp.max_length = max(nlp.max_length, segmentation_config['max_length'])
+    return nlp
+
+# function to split documents into sentences in a single batched pass (returns a list of sentences per document)
+# (split by the model server when it is running)
+def segment_documents(doc_contents):
+    served_sentences = call_served_model('segment', doc_contents)
+    if served_sentences is not None:
+        return served_sentences
+    nlp = get_sentence_segmenter()
+    docs = nlp.pipe(doc_contents, batch_size=segmentation_config['batch_size'], n_process=segmentation_config['n_process'])
+    return [[sent.text.strip() for sent in doc.sents] for doc in docs]
+
 # function to format, summarize and chunk the text content of documents
 def format_document_text_content(doc_content, doc_type):
     try:
@@ -326,51 +410,424 @@ def format_document_text_content(doc_content, doc_type):
         # #     The suit is dismissed and permission to reopen it in the future granted, with court fees refunded to the
         # #     plaintiff according to rules on limitation periods."""
 
-        nlp = spacy.load("en_core_web_sm")
-        doc = nlp(doc_content)
-        sentences = [sent.text.strip() for sent in doc.sents]
-        formatted_text = '\n'.join([' '.join(sentence.split('\n')) for sentence in sentences])
-        
-        text_splitter = CharacterTextSplitter(separator="\n", chunk_size=1000, chunk_overlap=200, length_function=len)
-        chunks = text_splitter.split_text(formatted_text)
-        return f"\n{25*'-'}\n".join(chunks)
+        sentences = segment_documents([doc_content])[0]
+        return chunk_document_sentences(sentences)
 
     except Exception as e:
         print(f"Exception occured in format_document_text_content: {e}")
         return None
 
-# function to extract and combine text from all pdf files in the case
-def create_document_text_content(case_details):
-    try:
-        case_intro = create_case_intro_from_case_details(case_details)
-        pdf_text = case_intro
+# function to chunk the sentences of a document
+def chunk_document_sentences(sentences):
+    formatted_text = '\n'.join([' '.join(sentence.split('\n')) for sentence in sentences])
+    
+    text_splitter = CharacterTextSplitter(separator="\n", chunk_size=1000, chunk_overlap=200, length_function=len)
+    chunks = text_splitter.split_text(formatted_text)
+    return f"\n{25*'-'}\n".join(chunks)
 
+# function to download all pdf files of a case
+def download_case_pdf_files(case_details, refresh=False):
+    try:
         case_type = case_details['Case Type']
         cnr_num = case_details['CNR Number']
-        list_of_interim_order_urls = eval(case_details['List of Interim Order URLs'])
+        list_of_interim_order_urls = case_details['List of Interim Order URLs']
         judgement_url = case_details['Judgement URL']
 
-        interim_order_filename_list, judgement_filename = save_pdf_files(case_type, cnr_num, list_of_interim_order_urls, judgement_url)
+        return save_pdf_files(case_type, cnr_num, list_of_interim_order_urls, judgement_url, refresh)
+
+    except Exception as e:
+        print(f"Exception occured in download_case_pdf_files: {e}")
+        return None
+
+# function to extract and combine text from the downloaded pdf files of a case
+def create_document_text_content_from_pdf_files(case_details, interim_order_filename_list, judgement_filename):
+    try:
+        case_intro = create_case_intro_from_case_details(case_details)
+        pdf_text = case_intro
+
         # print("interim_order_filename_list:", interim_order_filename_list)
         # print("judgement_filename:", judgement_filename)
 
-        if interim_order_filename_list:
-            for i, filename in enumerate(interim_order_filename_list):
-                text = extract_text_from_pdf_file(filename)
-                pdf_text = pdf_text + '\n' + f'Interim Order No. {i+1} is given below.\n\n' + format_document_text_content(text, DocumentType.INTERIM_ORDER) + '\n' + 25*'-' + '\n'
+        interim_order_filename_list = [filename for filename in interim_order_filename_list or [] if filename]
+        doc_filenames = interim_order_filename_list + ([judgement_filename] if judgement_filename else [])
 
-        if judgement_filename:
-            text = extract_text_from_pdf_file(judgement_filename)
-            pdf_text = pdf_text + f'Judgement is given below.\n\n' + format_document_text_content(text, DocumentType.JUDGEMENT) + '\n' + 25*'-' + '\n'
+        # all documents of the case are split into sentences in one batch
+        doc_texts = [extract_text_from_pdf_file(filename) or '' for filename in doc_filenames]
+        doc_chunks = [chunk_document_sentences(sentences) for sentences in segment_documents(doc_texts)]
+
+        for i in range(len(interim_order_filename_list)):
+            pdf_text = pdf_text + '\n' + f'Interim Order No. {i+1} is given below.\n\n' + doc_chunks[i] + '\n' + 25*'-' + '\n'
 
-        delete_downloads_folder()
+        if judgement_filename:
+            pdf_text = pdf_text + f'Judgement is given below.\n\n' + doc_chunks[-1] + '\n' + 25*'-' + '\n'
 
         return pdf_text.strip()
 
+    except Exception as e:
+        print(f"Exception occured in create_document_text_content_from_pdf_files: {e}")
+        return None
+
+# function to extract and combine text from all pdf files in the case
+def create_document_text_content(case_details):
+    try:
+        interim_order_filename_list, judgement_filename = download_case_pdf_files(case_details)
+        return create_document_text_content_from_pdf_files(case_details, interim_order_filename_list, judgement_filename)
+
     except Exception as e:
         print(f"Exception occured in create_document_text_content: {e}")
         return None
-    
+
+# function to create the metadata of a case stored alongside its document
+# (the typed fields are used by the search filters)
+def create_case_metadata(case_details):
+    list_of_interim_order_urls = case_details['List of Interim Order URLs']
+    metadata = {"case_type": str(case_details['Case Type']), "cnr_num": str(case_details['CNR Number']), "case_title": str(case_details['Case Title']), "list_of_interim_order_urls": json.dumps(list_of_interim_order_urls), "judgement_url": str(case_details['Judgement URL'])}
+    metadata.update(create_typed_case_metadata(case_details))
+    return metadata
+
+# function to get the identifiers of a case looked up exactly by the keyword index
+def get_case_identifiers(case_details):
+    return [case_details.get(key) for key in ('CNR Number', 'CI Number', 'Case Number')]
+
+# function to split the text of a case document into its chunks
+def split_document_into_chunks(document_text):
+    return [chunk.strip() for chunk in document_text.split(25*'-') if chunk.strip()]
+
+# function to create the chunk records of a case document for the chunk collection
+# (the chunks are embedded once here, searched by the search page and reused by the QnA retriever;
+# a chunk gets the filterable metadata of its case and the number of the pdf page it starts on when the page is known)
+def create_chunk_records(doc_id, case_metadata, document_text):
+    chunks = split_document_into_chunks(document_text)
+    ids = [f"{doc_id}_chunk_{chunk_index}" for chunk_index in range(len(chunks))]
+    metadatas = []
+    page_number = None
+    for chunk_index, chunk in enumerate(chunks):
+        metadata = {"case_id": doc_id, "chunk_index": chunk_index, "cnr_num": case_metadata['cnr_num'], **get_filter_metadata(case_metadata)}
+        page_tags = page_tag_pattern.findall(chunk)
+        if page_tags:
+            # text before the first page tag belongs to the previous page, or is the heading of a new document
+            first_page_number = int(page_tags[0])
+            text_before_page_tag = chunk[:chunk.index(page_tag_template.format(first_page_number))].strip()
+            page_number = first_page_number if not text_before_page_tag or first_page_number == 1 else first_page_number - 1
+        if page_number is not None:
+            metadata["page"] = page_number
+        if page_tags:
+            page_number = int(page_tags[-1])
+        metadatas.append(metadata)
+    return ids, chunks, metadatas
+
+# function to add the chunks of case documents to the chunk collection
+def add_chunks_to_collection(chunk_collection, list_of_doc_ids, list_of_case_metadatas, list_of_document_texts):
+    ids, chunks, metadatas = [], [], []
+    for doc_id, case_metadata, document_text in zip(list_of_doc_ids, list_of_case_metadatas, list_of_document_texts):
+        chunk_ids, doc_chunks, chunk_metadatas = create_chunk_records(doc_id, case_metadata, document_text)
+        ids += chunk_ids
+        chunks += doc_chunks
+        metadatas += chunk_metadatas
+    if ids:
+        chunk_collection.add(documents=chunks, metadatas=metadatas, ids=ids)
+
+# function to fill the chunk collection from the documents already in the document collection
+# (only documents without chunks are chunked: they are legacy records holding the full text, while the
+# documents of cases ingested with chunks hold only the case intro, so their chunks are never replaced)
+def backfill_chunk_collection(doc_collection, chunk_collection, batch_size):
+    try:
+        num_of_documents = doc_collection.count()
+        num_of_backfilled_documents = 0
+        for offset in range(0, num_of_documents, batch_size):
+            result = doc_collection.get(offset=offset, limit=batch_size, include=['documents', 'metadatas'])
+            chunked_doc_ids = {metadata['case_id'] for metadata in chunk_collection.get(where={"case_id": {"$in": result['ids']}}, include=['metadatas'])['metadatas']}
+            records = [(doc_id, metadata, document) for doc_id, metadata, document in zip(result['ids'], result['metadatas'], result['documents']) if doc_id not in chunked_doc_ids]
+            if records:
+                add_chunks_to_collection(chunk_collection, *map(list, zip(*records)))
+            num_of_backfilled_documents += len(records)
+            print(f"Chunks of {min(offset + batch_size, num_of_documents)}/{num_of_documents} documents checked, {num_of_backfilled_documents} documents backfilled...")
+
+    except Exception as e:
+        print(f"Exception occured in backfill_chunk_collection: {e}")
+        return None
+
+# function to build the keyword index from the cases already in the document and chunk collections
+def build_keyword_index(doc_collection, chunk_collection, batch_size):
+    try:
+        keyword_index = KeywordIndex()
+        num_of_documents = doc_collection.count()
+        for offset in range(0, num_of_documents, batch_size):
+            result = doc_collection.get(offset=offset, limit=batch_size, include=['documents', 'metadatas'])
+            chunks = chunk_collection.get(where={"case_id": {"$in": result['ids']}}, include=['documents', 'metadatas'])
+            chunks_by_doc_id = {}
+            for chunk, metadata in sorted(zip(chunks['documents'], chunks['metadatas']), key=lambda item: item[1]['chunk_index']):
+                chunks_by_doc_id.setdefault(metadata['case_id'], []).append(chunk)
+            for doc_id, document, metadata in zip(result['ids'], result['documents'], result['metadatas']):
+                # the case intro holds the identifiers, the chunks hold the full text
+                case_details = dict(re.findall(r'^(CNR Number|CI Number|Case Number): (.*)$', document, re.M))
+                case_details.setdefault('CNR Number', metadata['cnr_num'])
+                keyword_index.add_document(doc_id, '\n'.join(chunks_by_doc_id.get(doc_id, [document])), get_case_identifiers(case_details))
+            print(f"Keywords of {min(offset + batch_size, num_of_documents)}/{num_of_documents} documents indexed...")
+        keyword_index.save(keyword_index_path)
+        return keyword_index
+
+    except Exception as e:
+        print(f"Exception occured in build_keyword_index: {e}")
+        return None
+
+# function to get the id of the document of a case (its CNR number, stable across runs and row orders)
+def get_case_doc_id(case_details):
+    return str(case_details['CNR Number'])
+
+# function to get the content hash of a case record
+def get_case_hash(case_details):
+    return hashlib.sha256(json.dumps(case_details, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+# function to get the content hashes of the downloaded pdf files of a case
+def get_pdf_hashes(interim_order_filename_list, judgement_filename):
+    return [get_cached_file_hash(filename) if filename else None for filename in list(interim_order_filename_list or []) + [judgement_filename]]
+
+# function to get the case hash recorded in the ingest state for an ingested case
+# (a case ingested without one of its pdf files, as its download failed, is recorded with an empty hash
+# so that the next run ingests it again instead of treating it as unchanged)
+def get_ingested_case_hash(case_details, pdf_hashes):
+    *interim_order_hashes, judgement_hash = pdf_hashes or [None]
+    if None in interim_order_hashes or (case_details['Judgement URL'] and judgement_hash is None):
+        print(f"Case {case_details['CNR Number']} ingested without some of its pdf files, it will be ingested again on the next run...")
+        return ''
+    return get_case_hash(case_details)
+
+# function to plan an incremental ingestion of the court cases
+# (returns the cases to ingest, the stored pdf hashes of the unchanged cases whose pdf files are only
+# checked again, and the doc ids of the ingested cases no longer in the dataset)
+def plan_incremental_ingestion(list_of_court_cases, doc_collection, ingest_state, verify_pdfs=False):
+    court_cases = {}
+    for case_details in list_of_court_cases:
+        # a case listed twice is ingested with its last record
+        court_cases[get_case_doc_id(case_details)] = case_details
+    ingested_cases = ingest_state.get_cases()
+    existing_doc_ids = set(doc_collection.get(include=[])['ids'])
+
+    list_of_cases_to_ingest, stored_pdf_hashes = [], {}
+    for doc_id, case_details in court_cases.items():
+        ingested_case = ingested_cases.get(str(case_details['CNR Number']))
+        if ingested_case and doc_id in existing_doc_ids and ingested_case[1] == get_case_hash(case_details):
+            if verify_pdfs:
+                list_of_cases_to_ingest.append(case_details)
+                stored_pdf_hashes[doc_id] = ingested_case[2]
+        else:
+            list_of_cases_to_ingest.append(case_details)
+    return list_of_cases_to_ingest, stored_pdf_hashes, sorted(existing_doc_ids - set(court_cases))
+
+# function to delete cases from the collections, the keyword index and the ingest state
+def delete_cases(list_of_doc_ids, doc_collection, chunk_collection, keyword_index, ingest_state, batch_size=500):
+    for offset in range(0, len(list_of_doc_ids), batch_size):
+        batch_of_doc_ids = list_of_doc_ids[offset:offset + batch_size]
+        doc_collection.delete(ids=batch_of_doc_ids)
+        chunk_collection.delete(where={"case_id": {"$in": batch_of_doc_ids}})
+        for doc_id in batch_of_doc_ids:
+            keyword_index.remove_document(doc_id)
+        ingest_state.delete_cases(batch_of_doc_ids)
+    print(f"{len(list_of_doc_ids)} cases no longer in the dataset deleted...")
+
+# class to measure the throughput of a stage of the ingestion pipeline
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.num_of_items = 0
+        self.busy_time = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, num_of_items, time_taken):
+        with self.lock:
+            self.num_of_items += num_of_items
+            self.busy_time += time_taken
+
+    def report(self, wall_time):
+        return f"{self.name:<10} {self.num_of_items:>6} items {self.busy_time:>9.2f} s busy {self.num_of_items / wall_time if wall_time else 0:>8.2f} items/s"
+
+# class to write the ingested cases to the collections in bulk
+# (the case intros and chunks of many cases are embedded together in vectorized batches, then written
+# with one upsert of cases and one add of chunks, so that chromadb commits its segments once per flush)
+class CaseBatchWriter:
+    def __init__(self, doc_collection, chunk_collection, keyword_index, ingest_state, embedding_function, chunk_batch_size, embedding_batch_size, stage_stats):
+        self.doc_collection = doc_collection
+        self.chunk_collection = chunk_collection
+        self.keyword_index = keyword_index
+        self.ingest_state = ingest_state
+        self.embedding_function = embedding_function
+        self.chunk_batch_size = chunk_batch_size
+        self.embedding_batch_size = embedding_batch_size
+        self.stage_stats = stage_stats
+        self.pending_cases = []
+        self.num_of_pending_chunks = 0
+
+    # function to add a case, flushing once enough chunks are pending
+    def add(self, case_details, document_text, pdf_hashes):
+        doc_id = get_case_doc_id(case_details)
+        case_metadata = create_case_metadata(case_details)
+        chunk_records = create_chunk_records(doc_id, case_metadata, document_text)
+        self.pending_cases.append((doc_id, case_details, case_metadata, document_text, chunk_records, pdf_hashes))
+        self.num_of_pending_chunks += len(chunk_records[0])
+        if self.num_of_pending_chunks >= self.chunk_batch_size:
+            self.flush()
+
+    # function to embed texts in batches of embedding_batch_size
+    def embed(self, texts):
+        embeddings = []
+        for offset in range(0, len(texts), self.embedding_batch_size):
+            embeddings += list(self.embedding_function(texts[offset:offset + self.embedding_batch_size]))
+        return embeddings
+
+    # function to embed and write the pending cases
+    def flush(self):
+        if not self.pending_cases:
+            return
+        list_of_doc_ids = [doc_id for doc_id, *_ in self.pending_cases]
+        intros = [create_case_intro_from_case_details(case_details) for doc_id, case_details, *_ in self.pending_cases]
+        chunk_ids, chunks, chunk_metadatas = [], [], []
+        for *_, (ids, doc_chunks, metadatas), pdf_hashes in self.pending_cases:
+            chunk_ids += ids
+            chunks += doc_chunks
+            chunk_metadatas += metadatas
+
+        embed_start_time = time.perf_counter()
+        intro_embeddings = self.embed(intros)
+        chunk_embeddings = self.embed(chunks)
+        self.stage_stats['embed'].record(len(intros) + len(chunks), time.perf_counter() - embed_start_time)
+
+        write_start_time = time.perf_counter()
+        # the case record holds the case intro, the full text is searched chunk by chunk
+        self.doc_collection.upsert(ids=list_of_doc_ids, embeddings=intro_embeddings, documents=intros, metadatas=[case_metadata for doc_id, case_details, case_metadata, *_ in self.pending_cases])
+        # a changed case may have fewer chunks than before, so its old chunks are replaced
+        self.chunk_collection.delete(where={"case_id": {"$in": list_of_doc_ids}})
+        if chunk_ids:
+            self.chunk_collection.add(ids=chunk_ids, embeddings=chunk_embeddings, documents=chunks, metadatas=chunk_metadatas)
+        for doc_id, case_details, case_metadata, document_text, chunk_records, pdf_hashes in self.pending_cases:
+            self.keyword_index.add_document(doc_id, document_text, get_case_identifiers(case_details))
+        self.ingest_state.save_cases([
+            (str(case_details['CNR Number']), doc_id, get_ingested_case_hash(case_details, pdf_hashes), pdf_hashes)
+            for doc_id, case_details, case_metadata, document_text, chunk_records, pdf_hashes in self.pending_cases])
+        self.stage_stats['write'].record(len(self.pending_cases), time.perf_counter() - write_start_time)
+
+        print(f"{len(self.pending_cases)} cases with {len(chunk_ids)} chunks written...")
+        self.pending_cases = []
+        self.num_of_pending_chunks = 0
+
+# function run in the extraction processes to extract, OCR and segment the text of a case
+def extract_case_document(case_index, case_details, interim_order_filename_list, judgement_filename):
+    start_time = time.perf_counter()
+    document_text = create_document_text_content_from_pdf_files(case_details, interim_order_filename_list, judgement_filename)
+    return case_index, case_details, document_text, time.perf_counter() - start_time
+
+# function to ingest the court cases into the collection through a staged pipeline:
+# threads download the pdf files, a pool of processes extracts the text and a single
+# writer embeds and upserts the documents into the collection and the keyword index in bulk
+# (stages are connected by bounded queues so that memory stays capped); cases listed in
+# stored_pdf_hashes are downloaded again and skipped if their pdf files did not change
+def run_ingestion_pipeline(list_of_court_cases, doc_collection, chunk_collection, keyword_index, ingest_state, num_of_workers, num_of_download_threads, queue_size, chunk_batch_size, embedding_batch_size, embedding_function=None, stored_pdf_hashes=None):
+    download_queue = queue.Queue(maxsize=queue_size)
+    extract_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    stage_stats = {name: StageStats(name) for name in ('download', 'extract', 'embed', 'write')}
+    embedding_function = embedding_function or get_collection_embedding_function()
+    stored_pdf_hashes = stored_pdf_hashes or {}
+    pdf_hashes_by_case_index = {}
+    start_time = time.perf_counter()
+
+    def feed_cases():
+        for case_index, case_details in enumerate(list_of_court_cases):
+            download_queue.put((case_index, case_details))
+        for _ in range(num_of_download_threads):
+            download_queue.put(None)
+
+    # every stage thread sends its end of stream marker, even when it fails, so that the next stage never waits forever
+    def download_cases():
+        try:
+            while (item := download_queue.get()) is not None:
+                case_index, case_details = item
+                try:
+                    print("Case no. ", case_index+1, ":", case_details['CNR Number'])
+                    download_start_time = time.perf_counter()
+                    doc_id = get_case_doc_id(case_details)
+                    pdf_files = download_case_pdf_files(case_details, refresh=doc_id in stored_pdf_hashes)
+                    stage_stats['download'].record(1, time.perf_counter() - download_start_time)
+                    if pdf_files:
+                        pdf_hashes = get_pdf_hashes(*pdf_files)
+                        if stored_pdf_hashes.get(doc_id) == pdf_hashes:
+                            print(f"Skipping case no. {case_index+1} as its pdf files did not change...")
+                            continue
+                        pdf_hashes_by_case_index[case_index] = pdf_hashes
+                        extract_queue.put((case_index, case_details, *pdf_files))
+                except Exception as e:
+                    print(f"Exception occured in download_cases: {e}")
+        finally:
+            extract_queue.put(None)
+
+    def extract_cases(process_pool):
+        # at most queue_size cases are extracted at a time, results are passed on in submission order
+        # (once the process pool is broken, e.g. by a worker killed for lack of memory, the remaining
+        # cases are passed on without text and skipped by the writer)
+        try:
+            in_flight = deque()
+            num_of_finished_download_threads = 0
+            is_pool_broken = False
+            while num_of_finished_download_threads < num_of_download_threads:
+                item = extract_queue.get()
+                if item is None:
+                    num_of_finished_download_threads += 1
+                    continue
+                if not is_pool_broken:
+                    try:
+                        in_flight.append((item, process_pool.submit(extract_case_document, *item)))
+                    except BrokenProcessPool as e:
+                        print(f"Exception occured in extract_cases: {e}")
+                        is_pool_broken = True
+                if is_pool_broken:
+                    while in_flight:
+                        write_queue.put(get_extraction_result(*in_flight.popleft()))
+                    write_queue.put((item[0], item[1], None, 0.0))
+                if len(in_flight) >= queue_size:
+                    write_queue.put(get_extraction_result(*in_flight.popleft()))
+            while in_flight:
+                write_queue.put(get_extraction_result(*in_flight.popleft()))
+        finally:
+            write_queue.put(None)
+
+    def get_extraction_result(item, future):
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Exception occured in extract_case_document: {e}")
+            case_index, case_details = item[:2]
+            return case_index, case_details, None, 0.0
+
+    with ProcessPoolExecutor(max_workers=num_of_workers) as process_pool:
+        threads = [threading.Thread(target=feed_cases, daemon=True)]
+        threads += [threading.Thread(target=download_cases, daemon=True) for _ in range(num_of_download_threads)]
+        threads += [threading.Thread(target=extract_cases, args=(process_pool,), daemon=True)]
+        for thread in threads:
+            thread.start()
+
+        writer = CaseBatchWriter(doc_collection, chunk_collection, keyword_index, ingest_state, embedding_function, chunk_batch_size, embedding_batch_size, stage_stats)
+        while (item := write_queue.get()) is not None:
+            case_index, case_details, document_text, time_taken = item
+            stage_stats['extract'].record(1, time_taken)
+            if document_text is None:
+                print(f"Skipping case no. {case_index+1} as its text could not be extracted...")
+                continue
+            writer.add(case_details, document_text, pdf_hashes_by_case_index.pop(case_index, []))
+        writer.flush()
+
+        for thread in threads:
+            thread.join()
+
+    if stage_stats['write'].num_of_items:
+        keyword_index.save(keyword_index_path)
+    wall_time = time.perf_counter() - start_time
+    print(f"Ingestion completed in {wall_time:.2f} s")
+    for stats in stage_stats.values():
+        print(stats.report(wall_time))
+    embed_stats, write_stats = stage_stats['embed'], stage_stats['write']
+    print(f"Embeddings per second: {embed_stats.num_of_items / embed_stats.busy_time if embed_stats.busy_time else 0:.2f}, bulk load wall time: {embed_stats.busy_time + write_stats.busy_time:.2f} s")
+    return stage_stats
+
 # function to write document text to a txt file
 def write_document_content_to_txt_file(i, element):
     try:
@@ -385,32 +842,51 @@ def write_document_content_to_txt_file(i, element):
         return None
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ingest the scraped court cases into the document collection.")
+    parser.add_argument('--csv-file', default='output.csv', help="csv dataset of the scraped court cases")
+    parser.add_argument('--workers', type=int, default=ingestion_config['workers'] or os.cpu_count(), help="number of processes extracting the text of the documents")
+    parser.add_argument('--download-threads', type=int, default=ingestion_config['download_threads'], help="number of threads downloading the pdf files")
+    parser.add_argument('--queue-size', type=int, default=ingestion_config['queue_size'], help="maximum number of cases waiting between two stages")
+    parser.add_argument('--batch-size', type=int, default=ingestion_config['batch_size'], help="number of documents read at a time when backfilling the chunks or the keyword index")
+    parser.add_argument('--chunk-batch-size', type=int, default=ingestion_config['chunk_batch_size'], help="number of chunks embedded and written to the collection at a time")
+    parser.add_argument('--embedding-batch-size', type=int, default=ingestion_config['embedding_batch_size'], help="number of texts passed to the embedding model in one call")
+    parser.add_argument('--backfill-chunks', action='store_true', help="only chunk the documents ingested before the chunk collection existed (cases with chunks are left as they are)")
+    parser.add_argument('--build-keyword-index', action='store_true', help="only build the keyword index from the documents already ingested")
+    parser.add_argument('--verify-pdfs', action='store_true', help="download the pdf files of unchanged cases again and ingest the cases whose pdf files changed")
+    parser.add_argument('--publish-snapshot', action=argparse.BooleanOptionalAction, default=snapshot_config['enabled'], help="export the collections to a serving snapshot and publish it after ingesting")
+    args = parser.parse_args()
+
     client = chromadb.PersistentClient(path="data")
     # sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=embedding_model)
-    doc_collection = client.get_or_create_collection(name=db_name)
-
-    list_of_court_cases = csv_to_list_of_dicts('output.csv')
-    # demo_data = {'CI Number': 'KLHC010000012011', 'CNR Number': '200100000012011', 'Case Number': 'Adml.S. 1/2011', 'Case Title': 'UNICORN MARINE SERVICES PVT.LTD.v/sOWNERS AND PARTIES INTERESTED IN THE VES', 'Case Type': 'Adml.S.', 'Case Status': 'DISPOSED', 'Filing Date': '06-05-2011', 'Registration Date': '06-05-2011', 'Under Act(s)': 'act1', 'Under Section(s)': 'sec1', 'Petitioner': 'UNICORN MARINE SERVICES PVT.LTD.', 'Respondent': 'OWNERS AND PARTIES INTERESTED IN THE VES', 'Judge': 'HONOURABLE MR.JUSTICE HARUN-UL-RASHID', 'Bench': 'bench1', 'History of Case Hearings': "[{'#': '1', 'Cause List Type': 'Daily List', 'Hon: Judge Name': 'HONOURABLE MR.JUSTICE P.BHAVADASAN', 'BusinessDate': '25-11-2011', 'NextDate(Tentative Date)': '04-05-2012', 'Purpose of Hearing': 'PETITIONS', 'Order': 'o1'}, {'#': '2', 'Cause List Type': 'Part Two', 'Hon: Judge Name': 'HONOURABLE MR.JUSTICE N.K.BALAKRISHNAN', 'BusinessDate': '04-05-2012', 'NextDate(Tentative Date)': '21-06-2012', 'Purpose of Hearing': 'PETITIONS', 'Order': 'o2'}, {'#': '3', 'Cause List Type': 'Part Two', 'Hon: Judge Name': 'HONOURABLE MR.JUSTICE HARUN-UL-RASHID', 'BusinessDate': '21-06-2012', 'NextDate(Tentative Date)': '22-06-2012', 'Purpose of Hearing': 'PETITIONS', 'Order': 'o3'}, {'#': '4', 'Cause List Type': 'Daily List', 'Hon: Judge Name': '2963-HONOURABLE THE AG.CHIEF JUSTICE MR.M.M.PAREED PILLAY', 'BusinessDate': '22-06-2012', 'NextDate(Tentative Date)': '26-06-2012', 'Purpose of Hearing': 'FOR SETTLEMENT', 'Order': 'o4'}, {'#': '5', 'Cause List Type': 'Part Two', 'Hon: Judge Name': 'HONOURABLE MR.JUSTICE HARUN-UL-RASHID', 'BusinessDate': '26-06-2012', 'NextDate(Tentative Date)': '26-06-2012', 'Purpose of Hearing': 'FOR ORDERS', 'Order': 'o5'}, {'#': '6', 'Cause List Type': 'type1', 'Hon: Judge Name': 'HONOURABLE MR.JUSTICE HARUN-UL-RASHID', 'BusinessDate': '26-06-2012', 'NextDate(Tentative Date)': 'date1', 'Purpose of Hearing': 'pup1', 'Order': 'o6'}]", 'Judgement Date': '26-06-2012', 'List of Interim Order URLs': "['https://hckinfo.kerala.gov.in/digicourt/Casedetailssearch/fileviewcitation?token=MjAwMTAwMDAwMDEyMDExXzEucGRm+&lookups=b3JkZXJzLzIwMTE=+&citationno=MjAxMjpLRVI6MjQ4OTU=', 'https://hckinfo.kerala.gov.in/digicourt/Casedetailssearch/fileviewcitation?token=MjAwMTAwMDAwMDEyMDExXzEucGRm+&lookups=b3JkZXJzLzIwMTE=+&citationno=MjAxMjpLRVI6MjQ4OTU=', 'https://hckinfo.kerala.gov.in/digicourt/Casedetailssearch/fileviewcitation?token=MjAwMTAwMDAwMDEyMDExXzEucGRm+&lookups=b3JkZXJzLzIwMTE=+&citationno=MjAxMjpLRVI6MjQ4OTU=']", 'Judgement URL': 'https://hckinfo.kerala.gov.in/digicourt/Casedetailssearch/fileviewcitation?token=MjAwMTAwMDAwMDEyMDExXzEucGRm+&lookups=b3JkZXJzLzIwMTE=+&citationno=MjAxMjpLRVI6MjQ4OTU='}
-    # print(demo_data)
-    # print()
-    # print(create_document_text_content(list_of_court_cases[70]))
-    
-    for i, case_details in enumerate(list_of_court_cases):
-        case_type = case_details['Case Type']
-        cnr_num = case_details['CNR Number']
-        case_title = case_details['Case Title']
-        list_of_interim_order_urls = eval(case_details['List of Interim Order URLs'])
-        judgement_url = case_details['Judgement URL']
-
-        print("Case no. ", i+1, ":", cnr_num)
-
-        doc_collection.add(
-            documents=[create_document_text_content(case_details)],
-            metadatas=[{"case_type": str(case_type), "cnr_num": str(cnr_num), "case_title": str(case_title), "list_of_interim_order_urls": f"{list_of_interim_order_urls}", "judgement_url": str(judgement_url)}],
-            ids=[f"id_{i+1}"]
-        )
-        # print(type(extract_and_join_text_from_pdfs(cnr_num, list_of_interim_order_urls, judgement_url)))
-        print()
+    # the HNSW parameters apply when a collection is created and are tuned for bulk loads
+    # the embedding model is served by the model server when it is running
+    embedding_function = get_collection_embedding_function()
+    doc_collection = client.get_or_create_collection(name=db_name, metadata=hnsw_config, embedding_function=embedding_function)
+    chunk_collection = client.get_or_create_collection(name=chunk_collection_name, metadata=hnsw_config, embedding_function=embedding_function)
+
+    if args.backfill_chunks:
+        backfill_chunk_collection(doc_collection, chunk_collection, args.batch_size)
+    elif args.build_keyword_index:
+        build_keyword_index(doc_collection, chunk_collection, args.batch_size)
+    else:
+        list_of_court_cases = csv_to_list_of_dicts(args.csv_file)
+        # print(create_document_text_content(list_of_court_cases[70]))
+
+        keyword_index = load_or_create_keyword_index(keyword_index_path)
+        ingest_state = IngestState(ingest_state_path)
+
+        # only new and changed cases are ingested, cases no longer in the dataset are deleted
+        list_of_cases_to_ingest, stored_pdf_hashes, list_of_doc_ids_to_delete = plan_incremental_ingestion(list_of_court_cases, doc_collection, ingest_state, args.verify_pdfs)
+        print(f"{len(list_of_court_cases)} cases in the dataset, {len(list_of_cases_to_ingest)} to ingest, {len(list_of_doc_ids_to_delete)} to delete...")
+        if list_of_doc_ids_to_delete:
+            delete_cases(list_of_doc_ids_to_delete, doc_collection, chunk_collection, keyword_index, ingest_state)
+            keyword_index.save(keyword_index_path)
+        if list_of_cases_to_ingest:
+            run_ingestion_pipeline(list_of_cases_to_ingest, doc_collection, chunk_collection, keyword_index, ingest_state, args.workers, args.download_threads, args.queue_size, args.chunk_batch_size, args.embedding_batch_size, embedding_function, stored_pdf_hashes)
+        ingest_state.close()
+        if args.publish_snapshot and (list_of_cases_to_ingest or list_of_doc_ids_to_delete):
+            export_snapshot(doc_collection, chunk_collection, snapshot_config['folder'])
+    print()
 
     # keyword = "nourinmol"
     # print(f"Searching for '{keyword}'...")
@@ -429,7 +905,7 @@ if __name__ == '__main__':
     print()
 
     # for element in result['metadatas'][0]:
-    #     print(f"Metadata: {element['case_type']} {element['cnr_num']} {element['case_title']} {eval(element['list_of_interim_order_urls'])} {element['judgement_url']}")
+    #     print(f"Metadata: {element['case_type']} {element['cnr_num']} {element['case_title']} {parse_list_field(element['list_of_interim_order_urls'])} {element['judgement_url']}")
     #     print()
 
     # for element in result['ids'][0]:
@@ -0,0 +1,48 @@
+import os
+import json
+import sqlite3
+import threading
+
+# class to persist what has been ingested for each case so that a re-run only ingests new or changed cases
+# (keyed by CNR number, with the content hash of the case record and of each of its pdf files)
+class IngestState:
+    def __init__(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS cases (
+                cnr_num TEXT PRIMARY KEY,
+                doc_id TEXT NOT NULL,
+                case_hash TEXT NOT NULL,
+                pdf_hashes TEXT NOT NULL
+            );
+        """)
+
+    # function to get the ingested cases as a dictionary of CNR number and (doc id, case hash, pdf hashes)
+    def get_cases(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT cnr_num, doc_id, case_hash, pdf_hashes FROM cases").fetchall()
+        return {cnr_num: (doc_id, case_hash, json.loads(pdf_hashes)) for cnr_num, doc_id, case_hash, pdf_hashes in rows}
+
+    # function to record the ingested cases of a batch (a list of CNR number, doc id, case hash and pdf hashes)
+    def save_cases(self, list_of_cases):
+        with self.lock:
+            self.connection.execute("BEGIN")
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?)",
+                [(cnr_num, doc_id, case_hash, json.dumps(pdf_hashes)) for cnr_num, doc_id, case_hash, pdf_hashes in list_of_cases])
+            self.connection.execute("COMMIT")
+
+    # function to forget the cases of a list of doc ids
+    def delete_cases(self, list_of_doc_ids):
+        with self.lock:
+            self.connection.executemany("DELETE FROM cases WHERE doc_id = ?", [(doc_id,) for doc_id in list_of_doc_ids])
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,167 @@
+import os
+import re
+import math
+import pickle
+from array import array
+
+import numpy as np
+
+token_pattern = re.compile(r'[a-z0-9]+')
+
+# function to split a text into lower case word tokens
+def tokenize(text):
+    return token_pattern.findall(text.lower())
+
+# function to normalize a case identifier so that 'Adml.S. 1/2011', 'ADML S 1/2011' and 'admls12011' match
+def normalize_identifier(identifier):
+    return re.sub(r'[^a-z0-9]', '', str(identifier).lower())
+
+# class of an in-process inverted index of the cases used for BM25 keyword search and exact identifier lookups
+# (postings are kept as compact arrays of document numbers and term frequencies, removed cases are
+# skipped until the index is compacted)
+class KeywordIndex:
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids = []
+        self.doc_numbers = {}
+        self.doc_lengths = array('I')
+        self.postings = {}
+        self.identifiers = {}
+        # identifier keys of each case, so that a case is removed without scanning all identifiers
+        self.identifier_keys = {}
+        self.removed = set()
+
+    # function to add the text and identifiers of a case (a case already in the index is replaced)
+    def add_document(self, doc_id, text, identifiers=()):
+        if doc_id in self.doc_numbers:
+            self.remove_document(doc_id)
+        doc_number = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.doc_numbers[doc_id] = doc_number
+
+        term_frequencies = {}
+        tokens = tokenize(text)
+        for token in tokens:
+            term_frequencies[token] = term_frequencies.get(token, 0) + 1
+        self.doc_lengths.append(len(tokens))
+        for term, frequency in term_frequencies.items():
+            if term not in self.postings:
+                self.postings[term] = (array('I'), array('H'))
+            doc_numbers, frequencies = self.postings[term]
+            doc_numbers.append(doc_number)
+            frequencies.append(min(frequency, 65535))
+
+        for identifier in identifiers:
+            if identifier:
+                key = normalize_identifier(identifier)
+                self.identifiers.setdefault(key, set()).add(doc_id)
+                self.identifier_keys.setdefault(doc_id, set()).add(key)
+
+    # function to remove a case from the index
+    def remove_document(self, doc_id):
+        doc_number = self.doc_numbers.pop(doc_id, None)
+        if doc_number is None:
+            return
+        self.removed.add(doc_number)
+        for key in self.identifier_keys.pop(doc_id, ()):
+            self.identifiers[key].discard(doc_id)
+            if not self.identifiers[key]:
+                del self.identifiers[key]
+
+    # function to get the number of cases in the index
+    def count(self):
+        return len(self.doc_numbers)
+
+    # function to get the cases whose CNR number, CI number or case number is the query
+    def lookup_identifier(self, query):
+        return sorted(self.identifiers.get(normalize_identifier(query), ()))
+
+    # function to get the cases best matching the words of a query with BM25 scoring
+    # (returns a list of case id and score, best first)
+    def search(self, query, n_results=10):
+        num_of_docs = self.count()
+        if not num_of_docs:
+            return []
+        doc_lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32).astype(np.float32)
+        average_doc_length = (doc_lengths.sum() - sum(self.doc_lengths[doc_number] for doc_number in self.removed)) / num_of_docs
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            doc_numbers, frequencies = self.postings[term]
+            doc_numbers = np.frombuffer(doc_numbers, dtype=np.uint32)
+            frequencies = np.frombuffer(frequencies, dtype=np.uint16).astype(np.float32)
+            idf = math.log(1 + (num_of_docs - len(doc_numbers) + 0.5) / (len(doc_numbers) + 0.5))
+            length_norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc_numbers] / max(average_doc_length, 1.0))
+            scores[doc_numbers] += idf * frequencies * (self.k1 + 1) / (frequencies + length_norm)
+        if self.removed:
+            scores[list(self.removed)] = 0.0
+
+        num_of_hits = min(n_results, int(np.count_nonzero(scores)))
+        if not num_of_hits:
+            return []
+        best_doc_numbers = np.argpartition(-scores, num_of_hits - 1)[:num_of_hits]
+        best_doc_numbers = best_doc_numbers[np.argsort(-scores[best_doc_numbers], kind='stable')]
+        return [(self.doc_ids[doc_number], float(scores[doc_number])) for doc_number in best_doc_numbers]
+
+    # function to rebuild the postings without the removed cases
+    def compact(self):
+        if not self.removed:
+            return
+        new_doc_numbers = {}
+        doc_ids, doc_lengths = [], array('I')
+        for doc_number, doc_id in enumerate(self.doc_ids):
+            if doc_number not in self.removed:
+                new_doc_numbers[doc_number] = len(doc_ids)
+                doc_ids.append(doc_id)
+                doc_lengths.append(self.doc_lengths[doc_number])
+        postings = {}
+        for term, (doc_numbers, frequencies) in self.postings.items():
+            kept = [(new_doc_numbers[doc_number], frequency) for doc_number, frequency in zip(doc_numbers, frequencies) if doc_number in new_doc_numbers]
+            if kept:
+                postings[term] = (array('I', [doc_number for doc_number, frequency in kept]), array('H', [frequency for doc_number, frequency in kept]))
+        self.doc_ids, self.doc_lengths, self.postings = doc_ids, doc_lengths, postings
+        self.doc_numbers = {doc_id: doc_number for doc_number, doc_id in enumerate(doc_ids)}
+        self.removed = set()
+
+    # function to save the index to a file (written to a temporary file first so readers never see a partial index)
+    def save(self, path):
+        self.compact()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'k1': self.k1, 'b': self.b, 'doc_ids': self.doc_ids, 'doc_lengths': self.doc_lengths,
+                         'postings': self.postings, 'identifiers': self.identifiers, 'identifier_keys': self.identifier_keys}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    # function to load an index saved to a file
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        keyword_index = cls(state['k1'], state['b'])
+        keyword_index.doc_ids = state['doc_ids']
+        keyword_index.doc_numbers = {doc_id: doc_number for doc_number, doc_id in enumerate(state['doc_ids'])}
+        keyword_index.doc_lengths = state['doc_lengths']
+        keyword_index.postings = state['postings']
+        keyword_index.identifiers = state['identifiers']
+        if 'identifier_keys' in state:
+            keyword_index.identifier_keys = state['identifier_keys']
+        else:
+            # indexes saved before the identifier keys were kept
+            for key, doc_ids in state['identifiers'].items():
+                for doc_id in doc_ids:
+                    keyword_index.identifier_keys.setdefault(doc_id, set()).add(key)
+        return keyword_index
+
+# function to load the index saved at a path, or create an empty index if there is none
+def load_or_create_keyword_index(path):
+    try:
+        if os.path.exists(path):
+            return KeywordIndex.load(path)
+    except Exception as e:
+        print(f"Exception occured in load_or_create_keyword_index: {e}")
+    return KeywordIndex()
@@ -1,12 +1,29 @@
 import requests
+from requests.adapters import HTTPAdapter
 import webbrowser
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import os
 import csv
 import re
 import PyPDF2
 import time
 import sys
+import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from checkpoint_store import CheckpointStore
+from pdf_cache import PdfCache, export_cached_file
+
+def load_config(filename):
+    with open(filename, 'r') as f:
+        config = json.load(f)
+    return config
+
+config = load_config('config.json')
+scraper_config = config['scraper']
 
 # function to write a string to a TXT file
 def write_string_to_txt_file(string_content):
@@ -18,13 +35,69 @@ def write_string_to_txt_file(string_content):
     except IOError as e:
         print(f"Error writing to file: {e}")
 
+# html parser used for the case details pages (lxml is much faster than the builtin parser)
+try:
+    import lxml
+    html_parser = 'lxml'
+except ImportError:
+    html_parser = 'html.parser'
+
+# class of the tables holding the case details in a case details page
+case_details_table_class = 'table table-striped table-bordered table-hover table-shadow'
+
+# only the case details tables and the document buttons of a case details page are parsed
+case_details_strainer = SoupStrainer(['table', 'button'])
+
+# base url of Kerala High Court website
+base_url = scraper_config['base_url']
 # url of Kerala High Court website page with case details searched using case type
-url = 'https://hckinfo.kerala.gov.in/digicourt/Casedetailssearch/Statuscasetype'
+url = f'{base_url}/Casedetailssearch/Statuscasetype'
+
+# function to point the scraper at another base url (e.g. a local stand-in server)
+def set_base_url(new_base_url):
+    global base_url, url
+    base_url = new_base_url.rstrip('/')
+    url = f'{base_url}/Casedetailssearch/Statuscasetype'
+
+# pooled HTTP session shared by all scraper workers so that connections are kept alive
+http_session = None
+max_connections_per_host = scraper_config['max_connections_per_host']
+host_semaphores = {}
+host_semaphores_lock = threading.Lock()
+
+# function to create a HTTP session with a keep-alive connection pool
+def configure_http_session(connections_per_host):
+    global http_session, max_connections_per_host
+    max_connections_per_host = connections_per_host
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=connections_per_host, pool_maxsize=connections_per_host, pool_block=True)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    http_session = session
+    with host_semaphores_lock:
+        host_semaphores.clear()
+    return session
+
+configure_http_session(max_connections_per_host)
+
+# function to get the semaphore limiting concurrent requests to the host of the url
+def get_host_semaphore(request_url):
+    host = urlparse(request_url).netloc
+    with host_semaphores_lock:
+        if host not in host_semaphores:
+            host_semaphores[host] = threading.BoundedSemaphore(max_connections_per_host)
+        return host_semaphores[host]
+
+# function to make a HTTP request through the pooled session within the per-host limit
+def http_request(method, request_url, **kwargs):
+    kwargs.setdefault('timeout', scraper_config['request_timeout'])
+    with get_host_semaphore(request_url):
+        return http_session.request(method, request_url, **kwargs)
 
 # function to check if a website exists at the url
 def check_website_exists(url):
     try:
-        response = requests.head(url)
+        response = http_request('HEAD', url)
         return response.status_code == 200
     except requests.ConnectionError:
         return False
@@ -38,7 +111,7 @@ def open_website(url):
 def create_soup_object(url):
     try:
         # fetch the HTML content of the website
-        response = requests.get(url)
+        response = http_request('GET', url)
         # raise an exception if the request was not successful
         response.raise_for_status()
         # create a BeautifulSoup object
@@ -52,9 +125,9 @@ def create_soup_object(url):
 def get_case_results_casetype_year(casetype, year):
     try:
         # make a POST request to the API with the provided data
-        api_url = 'https://hckinfo.kerala.gov.in/digicourt/Casedetailssearch/Stausbycasetype'
+        api_url = f'{base_url}/Casedetailssearch/Stausbycasetype'
         # print(case_type, year)
-        response = requests.post(api_url, data={'case_type': casetype, 'case_year': year})
+        response = http_request('POST', api_url, data={'case_type': casetype, 'case_year': year})
         response.raise_for_status()  # Check for any HTTP errors
         
         # extract the HTML content from the response
@@ -113,19 +186,31 @@ def extract_cinum_cnrnum_casenum_casetitle_list(result_soup):
 def get_case_details_from_parameters(parameters):
     try:
         # make a POST request to the API with the provided data
-        api_url = 'https://hckinfo.kerala.gov.in/digicourt/Casedetailssearch/Viewcasestatus'
-        response = requests.post(api_url, data={'cino': parameters["CI Number"], 'case_no': parameters["CNR Number"]})
+        api_url = f'{base_url}/Casedetailssearch/Viewcasestatus'
+        response = http_request('POST', api_url, data={'cino': parameters["CI Number"], 'case_no': parameters["CNR Number"]})
         response.raise_for_status()  # Check for any HTTP errors
         
         # extract the HTML content from the response
         html_content = response.content
-        # create a BeautifulSoup object
-        soup = BeautifulSoup(html_content, 'html.parser')
-        return soup
+        return parse_case_details_page(html_content)
     except requests.RequestException as e:
         print("Error fetching content(get_case_details_from_parameters):", e)
         return None
     
+# function to create a BeautifulSoup object of a case details page
+# (limited to the tables and buttons that the case details are extracted from)
+def parse_case_details_page(html_content):
+    return BeautifulSoup(html_content, html_parser, parse_only=case_details_strainer)
+
+# function to index the case details tables of a case details page by their header in a single pass
+def create_case_details_table_index(case_details_soup):
+    table_index = {}
+    for table in case_details_soup.find_all('table', class_=case_details_table_class):
+        header = table.find('td', class_='table-header')
+        if header:
+            table_index.setdefault(header.get_text(strip=True), table)
+    return table_index
+
 # function to extract token, lookup and root user of interim orders
 def extract_token_lookup_rootuser_of_interim_orders(case_details_soup):
     try:
@@ -144,7 +229,7 @@ def extract_token_lookup_rootuser_of_interim_orders(case_details_soup):
 def generate_interim_order_urls_list(list_of_interim_order_parameters):
     try:
         # generate the URL of interim order file
-        file_urls = [f'https://hckinfo.kerala.gov.in/digicourt/Casedetailssearch/fileview?token={token}+&lookups={lookup}' for token, lookup, rootuser in tuple(list_of_interim_order_parameters)]
+        file_urls = [f'{base_url}/Casedetailssearch/fileview?token={token}+&lookups={lookup}' for token, lookup, rootuser in tuple(list_of_interim_order_parameters)]
         return file_urls
     except requests.RequestException as e:
         print("Error fetching content(generate_interim_order_urls_list):", e)
@@ -172,7 +257,7 @@ def generate_judgement_url(judgement_parameters):
     try:
         # generate the URL of judgement file
         token, lookup, citationnum = tuple(judgement_parameters)
-        file_url = f'https://hckinfo.kerala.gov.in/digicourt/Casedetailssearch/fileviewcitation?token={token}+&lookups={lookup}+&citationno={citationnum}'
+        file_url = f'{base_url}/Casedetailssearch/fileviewcitation?token={token}+&lookups={lookup}+&citationno={citationnum}'
         return file_url
     except requests.RequestException as e:
         print("Error fetching content(generate_judgement_url):", e)
@@ -182,7 +267,7 @@ def generate_judgement_url(judgement_parameters):
 def get_pdf_file_url(file_url):
     try:
         # fetch the HTML content of the website
-        response = requests.get(file_url)
+        response = http_request('GET', file_url)
         response.raise_for_status()  # Check for any HTTP errors
         # extract the HTML content from the response
         html_content = response.content
@@ -201,26 +286,42 @@ def get_pdf_file_url(file_url):
 def get_pdf_file_content(pdf_url):
     try:
         # send a GET request to the URL
-        response = requests.get(pdf_url)
+        response = http_request('GET', pdf_url)
         response.raise_for_status()  # Check for any HTTP errors
         return response.content
     except Exception as e:
         print("Error fetching content(get_pdf_file_content):", e)
         return None
 
+# function to download a pdf file (returns the pdf url and the content of the pdf file)
+def fetch_pdf_file(file_url):
+    pdf_url = get_pdf_file_url(file_url)
+    pdf_content = get_pdf_file_content(pdf_url) if pdf_url else None
+    return pdf_url, pdf_content
+
+# pdf cache shared with the ingester so that every pdf file is downloaded at most once
+pdf_cache = None
+pdf_cache_lock = threading.Lock()
+
+# function to get the pdf cache (opened on first use)
+def get_pdf_cache():
+    global pdf_cache
+    with pdf_cache_lock:
+        if pdf_cache is None:
+            pdf_cache = PdfCache(config['pdf_cache']['folder'], config['pdf_cache']['max_size_mb'])
+        return pdf_cache
+
 # write pdf file
 def write_pdf_file(folderpath, url, filename_prefix, message):
     try:
         if len(url) > 0:
-            pdf_url = get_pdf_file_url(url)
-            pdf_content = get_pdf_file_content(pdf_url)
+            cached_file_path, pdf_url = get_pdf_cache().get_pdf_file(url, fetch_pdf_file)
             filename = filename_prefix + '_' + pdf_url.split('/')[-1]
             file_path = os.path.join(folderpath, filename)
             
-            # write the content of the response to a PDF file
-            with open(file_path, 'wb') as f:
-                f.write(pdf_content)
-                print(f"{message}: {file_path}")
+            # place the cached PDF file in the case folder
+            export_cached_file(cached_file_path, file_path)
+            print(f"{message}: {file_path}")
 
             return file_path
     except Exception as e:
@@ -228,7 +329,9 @@ def write_pdf_file(folderpath, url, filename_prefix, message):
         return None
     
 # function to download and save files
-def save_pdf_files(year, case_num, interim_order_url_list, judgement_url):
+# (downloads are fanned out over the executor when one is given, and files
+# already downloaded by an earlier run of the crawl are not downloaded again)
+def save_pdf_files(year, case_num, interim_order_url_list, judgement_url, executor=None, downloaded_files=None, on_file_saved=None):
     try:
         root_directory = 'new_coduments'
         case_folder_name = str(year) + '_' + str(case_num)
@@ -238,19 +341,30 @@ def save_pdf_files(year, case_num, interim_order_url_list, judgement_url):
         judgement_folderpath = root_directory + '/' + case_folder_name
 
         # create folders if does not exist
-        if not os.path.exists(interim_orders_folderpath):
-            os.makedirs(interim_orders_folderpath)
+        os.makedirs(interim_orders_folderpath, exist_ok=True)
 
-        interim_order_filename_list = []
+        download_jobs = []
         for index, url in enumerate(interim_order_url_list):
             filename_prefix = f"Interim_order_{index+1}"
             message = f"Printing Interim Order # {index+1}/{len(interim_order_url_list)}..."
-            interim_order_filename_list.append(write_pdf_file(interim_orders_folderpath, url, filename_prefix, message))
-            # print('interim_order_filename_list', interim_order_filename_list)
+            download_jobs.append((interim_orders_folderpath, url, filename_prefix, message))
+        download_jobs.append((judgement_folderpath, judgement_url, "Judgement", "Printing Judgement"))
+
+        def download_job(job):
+            url = job[1]
+            if downloaded_files and downloaded_files.get(url) and os.path.exists(downloaded_files[url]):
+                return downloaded_files[url]
+            file_path = write_pdf_file(*job)
+            if file_path and on_file_saved:
+                on_file_saved(url, file_path)
+            return file_path
+
+        if executor:
+            filenames = list(executor.map(download_job, download_jobs))
+        else:
+            filenames = [download_job(job) for job in download_jobs]
 
-        filename_prefix = "Judgement"
-        message = "Printing Judgement"
-        judgement_filename = write_pdf_file(judgement_folderpath, judgement_url, filename_prefix, message)
+        interim_order_filename_list, judgement_filename = filenames[:-1], filenames[-1]
         print("PDF files saved successfully...")
 
         return interim_order_filename_list, judgement_filename
@@ -338,7 +452,8 @@ def extract_details_from_petitioner_table(table):
         # Define a regular expression pattern to match text starting with an integer followed by ")"
         pattern = re.compile(r'^\d+\)')
         # Filter td elements based on their text content using the regular expression
-        details = [td.get_text(strip=True)[td.get_text(strip=True).index(')')+1:].strip() for td in td_elements if pattern.match(td.get_text(strip=True))]
+        td_texts = [td.get_text(strip=True) for td in td_elements]
+        details = [text[text.index(')')+1:].strip() for text in td_texts if pattern.match(text)]
         # print(details)
 
         return {"Petitioner": ', '.join(details)}
@@ -355,7 +470,8 @@ def extract_details_from_respondent_table(table):
         pattern = re.compile(r'^\d+\)')
         # Filter td elements based on their text content using the regular expression
         # print([td.get_text(strip=True) for td in td_elements])
-        details = [td.get_text(strip=True)[td.get_text(strip=True).index(')')+1:].strip() for td in td_elements if pattern.match(td.get_text(strip=True))]
+        td_texts = [td.get_text(strip=True) for td in td_elements]
+        details = [text[text.index(')')+1:].strip() for text in td_texts if pattern.match(text)]
         # print(details)
 
         return {"Respondent": ', '.join(details)}
@@ -386,7 +502,7 @@ def extract_details_from_case_hearings_table(table):
         table_headers = [td.get_text(strip=True) for td in rows[0].find_all('td')]
         # print(table_headers)
         details = [
-            {table_headers[num]: row.find_all('td')[num].get_text(strip=True) for num in range(len(row.find_all('td')))}
+            {table_headers[num]: td.get_text(strip=True) for num, td in enumerate(row.find_all('td'))}
             for row in rows[1:]
         ]
         # print(details)
@@ -424,29 +540,16 @@ def combine_all_dicts(dicts):
 # function to extract relevant details from case details
 def extract_case_details(parameters, case_details_soup, list_of_interim_order_urls, judgement_url):
     try:
-        # Find all tables with the specified class
-        tables = case_details_soup.find_all('table', class_='table table-striped table-bordered table-hover table-shadow')
-
-        case_details_table = [table for table in tables if table.find('td', class_='table-header').get_text(strip=True) == 'CASE DETAILS'][0]
-        case_details = extract_details_from_case_details_table(case_details_table)
-
-        acts_table = [table for table in tables if table.find('td', class_='table-header').get_text(strip=True) == 'ACTS'][0]
-        acts = extract_details_from_acts_table(acts_table)
+        # index the tables by their header once instead of searching all tables for every header
+        table_index = create_case_details_table_index(case_details_soup)
 
-        petitioner_table = [table for table in tables if table.find('td', class_='table-header').get_text(strip=True) == 'PETITIONER AND ADVOCATE'][0]
-        petitioner = extract_details_from_petitioner_table(petitioner_table)
-
-        respondent_table = [table for table in tables if table.find('td', class_='table-header').get_text(strip=True) == 'RESPONDENT AND ADVOCATES'][0]
-        respondent = extract_details_from_respondent_table(respondent_table)
-
-        case_status_table = [table for table in tables if table.find('td', class_='table-header').get_text(strip=True) == 'CASE STATUS'][0]
-        case_status = extract_details_from_case_status_table(case_status_table)
-
-        case_hearings_table = [table for table in tables if table.find('td', class_='table-header').get_text(strip=True) == 'HISTORY OF CASE HEARING'][0]
-        case_hearings = extract_details_from_case_hearings_table(case_hearings_table)
-
-        judgement_table = [table for table in tables if table.find('td', class_='table-header').get_text(strip=True) == 'JUDGMENT']
-        judgement_date = extract_details_from_judgement_table(judgement_table[0]) if len(judgement_table) > 0 else {'Judgement Date': ''}
+        case_details = extract_details_from_case_details_table(table_index['CASE DETAILS'])
+        acts = extract_details_from_acts_table(table_index['ACTS'])
+        petitioner = extract_details_from_petitioner_table(table_index['PETITIONER AND ADVOCATE'])
+        respondent = extract_details_from_respondent_table(table_index['RESPONDENT AND ADVOCATES'])
+        case_status = extract_details_from_case_status_table(table_index['CASE STATUS'])
+        case_hearings = extract_details_from_case_hearings_table(table_index['HISTORY OF CASE HEARING'])
+        judgement_date = extract_details_from_judgement_table(table_index['JUDGMENT']) if 'JUDGMENT' in table_index else {'Judgement Date': ''}
 
         codument_urls = {'List of Interim Order URLs': list_of_interim_order_urls, 'Judgement URL': judgement_url}
 
@@ -459,59 +562,127 @@ def extract_case_details(parameters, case_details_soup, list_of_interim_order_ur
         print("Error fetching content(extract_case_details):", e)
         return None
     
-# function to create a csv dataset out of case details
-def create_csv_dataset(list_of_case_details):
+# function to scrape the case details and pdf files of a single case
+# (a case details page already crawled by an earlier run is not fetched again)
+def scrape_case(case_type, year, parameters, download_executor=None, checkpoint=None):
     try:
-        # Extracting header from the first dictionary
-        headers = list_of_case_details[0].keys()
-
-        # create folders if does not exist
-        if not os.path.exists('new_coduments'):
-            os.makedirs('new_coduments')
-
-        # Writing data to CSV file
-        with open('new_coduments/output.csv', 'w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=headers)
-            
-            # Writing headers to CSV file
-            writer.writeheader()
-            
-            # Writing data rows to CSV file
-            for row in list_of_case_details:
-                writer.writerow(row)
-        
-        print("CSV file generated successfully...")
-    except Exception as e:
-        print("Error fetching content(create_csv_dataset):", e)
-        return None
-    
-# function to append a line of case details to csv dataset
-def append_to_csv_dataset(header, case_details):
-    try:
-        # create folders if does not exist
-        if not os.path.exists('new_coduments'):
-            os.makedirs('new_coduments')
-
-        # Writing data to CSV file
-        with open('new_coduments/output.csv', 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            if os.stat('new_coduments/output.csv').st_size == 0:
-                # Writing headers to CSV file
-                writer.writerow(header)
-            
-            # Appending data to CSV file
-            writer.writerow(case_details)
-        
-        print("CSV file appended successfully...")
+        checkpoint_key = (str(case_type[0]), year, parameters['CNR Number'])
+        case_details = checkpoint.get_case_details(*checkpoint_key) if checkpoint else None
+
+        if case_details is None:
+            case_details_soup = get_case_details_from_parameters(parameters)
+            # write_string_to_txt_file(case_details_soup.prettify())
+
+            list_of_interim_order_parameters = extract_token_lookup_rootuser_of_interim_orders(case_details_soup)
+            judgement_parameters = extract_token_lookup_citationnum_of_judgement(case_details_soup)
+            list_of_interim_order_urls = generate_interim_order_urls_list(list_of_interim_order_parameters) if list_of_interim_order_parameters is not None else []
+            judgement_url = generate_judgement_url(judgement_parameters) if judgement_parameters is not None else ''
+            # print("No. of Interim Orders:", len(list_of_interim_order_urls))
+            # print("Judgement:", judgement_url)
+
+            case_details = extract_case_details(parameters, case_details_soup, list_of_interim_order_urls, judgement_url)
+            if case_details is None:
+                return None, 0
+            if checkpoint:
+                checkpoint.save_case_details(*checkpoint_key, case_details)
+
+        list_of_interim_order_urls = case_details['List of Interim Order URLs']
+        judgement_url = case_details['Judgement URL']
+        num_of_files = len(list_of_interim_order_urls) + (1 if judgement_url else 0)
+
+        downloaded_files = checkpoint.get_downloaded_files(*checkpoint_key) if checkpoint else None
+        on_file_saved = (lambda url, file_path: checkpoint.mark_file_downloaded(*checkpoint_key, url, file_path)) if checkpoint else None
+        interim_order_filename_list, judgement_filename = save_pdf_files(year, parameters['CNR Number'], list_of_interim_order_urls, judgement_url, download_executor, downloaded_files, on_file_saved)
+        # judgement_text = extract_judgement_text_from_judgement_file(judgement_filename)
+
+        # a case with a failed download stays pending so that the next resume of the crawl retries it
+        if checkpoint and (judgement_filename or not judgement_url) and all(interim_order_filename_list):
+            checkpoint.mark_pdfs_done(*checkpoint_key)
+
+        return case_details, num_of_files
     except Exception as e:
-        print("Error fetching content(append_to_csv_dataset):", e)
-        return None
+        print("Error fetching content(scrape_case):", e)
+        return None, 0
+
+# function to scrape a list of cases over a bounded pool of workers
+# (yields the case details and number of files of each case in the order of the list,
+# skipping the cases completed by an earlier run of the crawl)
+def scrape_cases(case_type, year, list_of_cases, case_executor, download_executor, checkpoint=None):
+    done_cnr_nums = checkpoint.get_done_cnr_nums(str(case_type[0]), year) if checkpoint else set()
+
+    def scrape_case_with_progress(indexed_parameters):
+        case_index, parameters = indexed_parameters
+        print(f"Case # {case_index+1}/{len(list_of_cases)} of case type {case_type} year {year}...")
+        return scrape_case(case_type, year, parameters, download_executor, checkpoint)
+
+    pending_cases = [(case_index, parameters) for case_index, parameters in enumerate(list_of_cases) if parameters['CNR Number'] not in done_cnr_nums]
+    if len(pending_cases) < len(list_of_cases):
+        print(f"Skipping {len(list_of_cases) - len(pending_cases)} cases completed by an earlier run...")
+
+    yield from case_executor.map(scrape_case_with_progress, pending_cases)
+
+# function to create the worker pools for case detail fetches and pdf downloads
+def create_scraper_executors(num_of_workers):
+    case_executor = ThreadPoolExecutor(max_workers=num_of_workers, thread_name_prefix='case')
+    download_executor = ThreadPoolExecutor(max_workers=num_of_workers, thread_name_prefix='download')
+    return case_executor, download_executor
+
+# class to stream case details to the csv dataset one row at a time
+# (the header is written once and rows are flushed to disk in batches)
+class CsvDatasetWriter:
+    def __init__(self, file_path, batch_size, truncate=False):
+        folder = os.path.dirname(file_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.batch_size = batch_size
+        self.num_of_pending_rows = 0
+        self.fieldnames = None
+        if not truncate and os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+            # reuse the header of the existing dataset
+            with open(file_path, 'r', newline='') as csvfile:
+                self.fieldnames = next(csv.reader(csvfile))
+        self.csvfile = open(file_path, 'w' if truncate else 'a', newline='')
+        self.writer = csv.DictWriter(self.csvfile, fieldnames=self.fieldnames) if self.fieldnames else None
+
+    # function to append a row of case details
+    def write(self, case_details):
+        if self.writer is None:
+            self.fieldnames = list(case_details.keys())
+            self.writer = csv.DictWriter(self.csvfile, fieldnames=self.fieldnames)
+            self.writer.writeheader()
+        self.writer.writerow(case_details)
+        self.num_of_pending_rows += 1
+        if self.num_of_pending_rows >= self.batch_size:
+            self.flush()
+
+    # function to flush the pending rows to disk
+    def flush(self):
+        self.csvfile.flush()
+        self.num_of_pending_rows = 0
+
+    def close(self):
+        self.flush()
+        self.csvfile.close()
+        print("CSV file generated successfully...")
 
 if __name__ == '__main__':
 
-    mode = 'run' if len(sys.argv) < 3 else sys.argv[2]
-    case_type_num = int(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Scrape case details and documents from the Kerala High Court website.")
+    parser.add_argument('case_type_num', type=int, help="position of the case type in the case type dropdown (starting from 1)")
+    parser.add_argument('mode', nargs='?', default='run', help="'run' to scrape the cases, anything else to only count them")
+    parser.add_argument('--workers', type=int, default=scraper_config['max_workers'], help="number of cases and pdf files fetched in parallel")
+    parser.add_argument('--connections-per-host', type=int, default=scraper_config['max_connections_per_host'], help="maximum number of concurrent requests to a host")
+    parser.add_argument('--base-url', default=base_url, help="base url of the court website")
+    parser.add_argument('--resume', action='store_true', help="continue from where the last run of the crawl stopped")
+    args = parser.parse_args()
+
+    mode = args.mode
+    case_type_num = args.case_type_num
+    set_base_url(args.base_url)
+    configure_http_session(args.connections_per_host)
+    case_executor, download_executor = create_scraper_executors(args.workers)
+    checkpoint = CheckpointStore(scraper_config['checkpoint_path'])
 
     start_time = time.time()
 
@@ -526,17 +697,37 @@ if __name__ == '__main__':
         for option in options[1:]:
             case_types.append((option['value'], option.get_text(strip=True)))
 
-        list_of_case_details = []
+        csv_writer = None
         total_num_of_cases = 0
         total_num_of_files = 0
+        num_of_scraped_cases = 0
+        scraping_start_time = time.time()
 
         try:
             for case_type in case_types[case_type_num-1:case_type_num]:
 
                 print(f"Process for case type {case_type} started...\n")
+
+                if mode == 'run':
+                    # the dataset is rewritten from the checkpoint on resume so that it
+                    # holds exactly the cases crawled so far, rows are appended from there on
+                    csv_writer = CsvDatasetWriter(scraper_config['csv_dataset_path'], scraper_config['csv_flush_batch_size'], truncate=True)
+                    if args.resume:
+                        num_of_crawled_cases = 0
+                        for case_details in checkpoint.iter_case_details(str(case_type[0])):
+                            csv_writer.write(case_details)
+                            num_of_crawled_cases += 1
+                        print(f"Resuming with {num_of_crawled_cases} cases crawled by an earlier run...\n")
+                    else:
+                        checkpoint.reset(str(case_type[0]))
   
                 for year in range(2011, 2025):
 
+                    if mode == 'run' and checkpoint.is_year_done(str(case_type[0]), year):
+                        print(f"Process for year {year} already completed by an earlier run...")
+                        print()
+                        continue
+
                     print(f"Process for year {year} started...")
                 
                     search_result_soup = get_case_results_casetype_year(case_type[0], year)
@@ -551,29 +742,21 @@ if __name__ == '__main__':
                         # print(list_of_cinum_casenum)
                         # print('list_of_cinum_casenum:', list_of_cinum_casenum)
                         # print()
-                        for case_index, parameters in list(enumerate(list_of_cinum_casenum))[364:]:
-                            print(f"Case # {case_index+1}/{len(list_of_cinum_casenum)} of case type {case_type} year {year}...")
-                            # print("parameters:", parameters)
-                            case_details_soup = get_case_details_from_parameters(parameters)
-                            # write_string_to_txt_file(case_details_soup.prettify())
-                        
-                            list_of_interim_order_parameters = extract_token_lookup_rootuser_of_interim_orders(case_details_soup)
-                            judgement_parameters = extract_token_lookup_citationnum_of_judgement(case_details_soup)
-                            list_of_interim_order_urls = generate_interim_order_urls_list(list_of_interim_order_parameters) if list_of_interim_order_parameters is not None else []
-                            judgement_url = generate_judgement_url(judgement_parameters) if judgement_parameters is not None else ''
-                            # print("No. of Interim Orders:", len(list_of_interim_order_urls))
-                            # print("Judgement:", judgement_url)
-                            total_num_of_files += len(list_of_interim_order_parameters) if list_of_interim_order_parameters else 0
-                            total_num_of_files += 1 if judgement_parameters else 0
-
-                            interim_order_filename_list, judgement_filename = save_pdf_files(year, parameters['CNR Number'], list_of_interim_order_urls, judgement_url)
-                            # judgement_text = extract_judgement_text_from_judgement_file(judgement_filename)
-
-                            list_of_case_details.append(extract_case_details(parameters, case_details_soup, list_of_interim_order_urls, judgement_url))
-                            create_csv_dataset(list_of_case_details)
+                        is_year_completed = list_of_cinum_casenum is not None
+                        for case_details, num_of_files in scrape_cases(case_type, year, list_of_cinum_casenum or [], case_executor, download_executor, checkpoint):
+                            total_num_of_files += num_of_files
+                            num_of_scraped_cases += 1
+                            if case_details:
+                                csv_writer.write(case_details)
+                            else:
+                                is_year_completed = False
 
                             print()
 
+                        # the year is done once every case of it is done, cases with failed downloads included
+                        if is_year_completed and checkpoint.get_done_cnr_nums(str(case_type[0]), year) >= {parameters['CNR Number'] for parameters in list_of_cinum_casenum}:
+                            checkpoint.mark_year_done(str(case_type[0]), year)
+
                     print(f"Process for year {year} completed...")
                     print()
 
@@ -584,15 +767,19 @@ if __name__ == '__main__':
         #     print(e)
 
         finally:
+            case_executor.shutdown(cancel_futures=True)
+            download_executor.shutdown(cancel_futures=True)
+            checkpoint.close()
             print(f"Total no. of cases: {total_num_of_cases}")
             if mode == 'run':
                 print(f"Total no. of files: {total_num_of_files}")
+                scraping_time = time.time() - scraping_start_time
+                print(f"Cases scraped per second: {num_of_scraped_cases / scraping_time if scraping_time else 0:.2f}")
                 print()
-                create_csv_dataset(list_of_case_details)
+                if csv_writer:
+                    csv_writer.close()
             
     end_time = time.time()
     time_taken = end_time - start_time
     print(f"Total time taken to complete the process: {round(time_taken // 60)} mins {round(time_taken % 60)} secs")
     print()
-
-        
\ No newline at end of file
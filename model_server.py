@@ -0,0 +1,307 @@
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Listener, Client
+
+from chromadb.api.types import Documents, EmbeddingFunction
+from chromadb.utils import embedding_functions
+
+def load_config(filename):
+    with open(filename, 'r') as f:
+        config = json.load(f)
+    return config
+
+config = load_config('config.json')
+model_server_config = config['model_server']
+
+# class to coalesce the requests of concurrent clients into batches run by a single thread
+# (a batch is started as soon as max_batch_size items are waiting or max_wait seconds after its first request,
+# so that one forward pass of the model serves many clients)
+class MicroBatcher:
+    def __init__(self, name, run_batch, max_batch_size, max_wait):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.num_of_requests = 0
+        self.num_of_items = 0
+        self.num_of_batches = 0
+        self.busy_time = 0.0
+        threading.Thread(target=self.run, daemon=True).start()
+
+    # function to queue the items of a request (returns a future of the results of the items)
+    def submit(self, items):
+        future = Future()
+        self.requests.put((list(items), future))
+        return future
+
+    # function to collect the requests of a batch, waiting at most max_wait seconds after the first one
+    def get_batch(self):
+        batch = [self.requests.get()]
+        num_of_items = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while num_of_items < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                request = self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            num_of_items += len(request[0])
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.get_batch()
+            items = [item for request_items, future in batch for item in request_items]
+            start_time = time.perf_counter()
+            try:
+                results = self.run_batch(items) if items else []
+            except Exception as e:
+                print(f"Exception occured in {self.name} batch: {e}")
+                for request_items, future in batch:
+                    future.set_exception(e)
+                continue
+            self.busy_time += time.perf_counter() - start_time
+            self.num_of_requests += len(batch)
+            self.num_of_items += len(items)
+            self.num_of_batches += 1
+            offset = 0
+            for request_items, future in batch:
+                future.set_result(list(results[offset:offset + len(request_items)]))
+                offset += len(request_items)
+
+    def stats(self):
+        return {'requests': self.num_of_requests, 'items': self.num_of_items, 'batches': self.num_of_batches, 'busy_time': self.busy_time}
+
+# class of the process holding the single copy of the embedding, OCR and sentence segmentation models
+# shared by the app sessions and the ingestion workers (models are loaded on their first request)
+class ModelServer:
+    def __init__(self, max_batch_size, max_wait):
+        self.models = {}
+        self.models_lock = threading.Lock()
+        self.batchers = {
+            'embed_chroma': MicroBatcher('embed_chroma', lambda texts: self.embed('chroma', texts), max_batch_size['embed'], max_wait),
+            'embed_qna': MicroBatcher('embed_qna', lambda texts: self.embed('qna', texts), max_batch_size['embed'], max_wait),
+            'ocr': MicroBatcher('ocr', self.ocr, max_batch_size['ocr'], max_wait),
+            'segment': MicroBatcher('segment', self.segment, max_batch_size['segment'], max_wait),
+        }
+
+    # function to get a model, loading it on first use
+    # (the loaders are the in-process ones of the modules, imported here so that clients never load them)
+    def get_model(self, name):
+        with self.models_lock:
+            if name not in self.models:
+                print(f"Loading model: {name}")
+                if name == 'chroma':
+                    self.models[name] = embedding_functions.DefaultEmbeddingFunction()
+                elif name == 'qna':
+                    from document_QnA import create_local_embedding_model
+                    self.models[name] = create_local_embedding_model()
+                elif name == 'ocr':
+                    from document_search import get_ocr_reader
+                    self.models[name] = get_ocr_reader()
+                elif name == 'segment':
+                    from document_search import get_sentence_segmenter
+                    self.models[name] = get_sentence_segmenter()
+            return self.models[name]
+
+    def embed(self, model_name, texts):
+        model = self.get_model(model_name)
+        if model_name == 'qna':
+            return model.embed_documents(texts)
+        return [list(map(float, embedding)) for embedding in model(texts)]
+
+    # function to read the text of page images (images of the same size are read in one batched call)
+    def ocr(self, images):
+        reader = self.get_model('ocr')
+        results = [None] * len(images)
+        images_by_shape = {}
+        for index, image in enumerate(images):
+            images_by_shape.setdefault(image.shape, []).append(index)
+        for indexes in images_by_shape.values():
+            if len(indexes) == 1:
+                batch_results = [reader.readtext(images[indexes[0]])]
+            else:
+                batch_results = reader.readtext_batched([images[index] for index in indexes])
+            for index, result in zip(indexes, batch_results):
+                results[index] = ''.join(line[1] + '\n' for line in result)
+        return results
+
+    def segment(self, texts):
+        nlp = self.get_model('segment')
+        return [[sent.text.strip() for sent in doc.sents] for doc in nlp.pipe(texts, batch_size=len(texts))]
+
+    # function to answer the requests of a client connection until it is closed
+    def handle_connection(self, connection):
+        try:
+            while True:
+                try:
+                    method, args = connection.recv()
+                except EOFError:
+                    break
+                try:
+                    if method == 'ping':
+                        response = ('ok', os.getpid())
+                    elif method == 'stats':
+                        response = ('ok', {name: batcher.stats() for name, batcher in self.batchers.items()})
+                    elif method == 'embed':
+                        model_name, texts = args
+                        response = ('ok', self.batchers[f'embed_{model_name}'].submit(texts).result())
+                    else:
+                        response = ('ok', self.batchers[method].submit(*args).result())
+                except Exception as e:
+                    response = ('error', f"{type(e).__name__}: {e}")
+                connection.send(response)
+        finally:
+            connection.close()
+
+    # function to serve the clients connecting to a unix socket (the socket is only accessible to its owner)
+    def serve(self, address):
+        folder = os.path.dirname(address)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if os.path.exists(address):
+            os.remove(address)
+        old_umask = os.umask(0o077)
+        try:
+            listener = Listener(address, family='AF_UNIX')
+        finally:
+            os.umask(old_umask)
+        with listener:
+            print(f"Model server listening on {address}")
+            while True:
+                connection = listener.accept()
+                threading.Thread(target=self.handle_connection, args=(connection,), daemon=True).start()
+
+# class of a client of the model server
+# (every thread of a process has its own connection so that the requests of concurrent sessions reach
+# the server together and are batched there; connections are never shared with forked processes)
+class ModelClient:
+    def __init__(self, address):
+        self.address = address
+        self.local = threading.local()
+
+    def get_connection(self):
+        if getattr(self.local, 'pid', None) != os.getpid():
+            self.local.connection = Client(self.address, family='AF_UNIX')
+            self.local.pid = os.getpid()
+        return self.local.connection
+
+    def request(self, method, *args):
+        connection = self.get_connection()
+        try:
+            connection.send((method, args))
+            status, result = connection.recv()
+        except (EOFError, OSError):
+            self.local.pid = None
+            raise
+        if status == 'error':
+            raise RuntimeError(result)
+        return result
+
+    def ping(self):
+        return self.request('ping')
+
+    def stats(self):
+        return self.request('stats')
+
+    # function to embed texts with a served embedding model ('chroma' for the collections, 'qna' for the QnA vector stores)
+    def embed(self, model_name, texts):
+        return self.request('embed', model_name, list(texts))
+
+    # function to read the text of page images (numpy arrays)
+    def ocr(self, images):
+        return self.request('ocr', list(images))
+
+    # function to split texts into sentences
+    def segment(self, texts):
+        return self.request('segment', list(texts))
+
+# client of the model server of the process, None while the server is disabled or not running
+model_client = None
+# time of the last attempt to connect to the model server (the server is looked for again every
+# reconnect_interval seconds, so that a server started after the process is used once it is up)
+last_connection_time = float('-inf')
+
+# function to get the client of the model server (callers load their own models when there is none)
+def get_model_client():
+    global model_client, last_connection_time
+    if model_client is None and model_server_config['enabled'] and time.monotonic() - last_connection_time >= model_server_config['reconnect_interval']:
+        last_connection_time = time.monotonic()
+        if os.path.exists(model_server_config['address']):
+            try:
+                client = ModelClient(model_server_config['address'])
+                client.ping()
+                model_client = client
+            except Exception as e:
+                print(f"Exception occured in get_model_client: {e}")
+    return model_client
+
+# function to drop the client of a model server that went away (the server is looked for again on the next request)
+def reset_model_client():
+    global model_client, last_connection_time
+    model_client = None
+    last_connection_time = float('-inf')
+
+# function to call a served model, returns None when the model server is not running so that the caller runs its own model
+# (a request failing on a broken connection is sent once more on a new connection, in case the server was restarted)
+def call_served_model(method, *args):
+    for _ in range(2):
+        client = get_model_client()
+        if client is None:
+            return None
+        try:
+            return getattr(client, method)(*args)
+        except (EOFError, OSError) as e:
+            print(f"Exception occured in call_served_model: {e}")
+            reset_model_client()
+    return None
+
+# class to use a served embedding model as the embedding function of a chroma collection
+# (texts are embedded by a model loaded in this process, on first use, whenever the model server is not running)
+class ServedEmbeddingFunction(EmbeddingFunction[Documents]):
+    def __init__(self, model_name, create_local_embedding_function):
+        self.model_name = model_name
+        self.create_local_embedding_function = create_local_embedding_function
+        self.local_embedding_function = None
+        self.lock = threading.Lock()
+
+    def get_local_embedding_function(self):
+        with self.lock:
+            if self.local_embedding_function is None:
+                self.local_embedding_function = self.create_local_embedding_function()
+        return self.local_embedding_function
+
+    def __call__(self, input: Documents):
+        embeddings = call_served_model('embed', self.model_name, input)
+        if embeddings is None:
+            embeddings = self.get_local_embedding_function()(input)
+        return embeddings
+
+# function to get the embedding function of the collections, served by the model server whenever it is running
+def get_collection_embedding_function():
+    if model_server_config['enabled']:
+        return ServedEmbeddingFunction('chroma', embedding_functions.DefaultEmbeddingFunction)
+    return embedding_functions.DefaultEmbeddingFunction()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the embedding, OCR and sentence segmentation models to the app and the ingestion workers.")
+    parser.add_argument('--address', default=model_server_config['address'], help="path of the unix socket of the server")
+    parser.add_argument('--max-wait-ms', type=float, default=model_server_config['max_wait_ms'], help="milliseconds a batch waits for more requests after its first one")
+    parser.add_argument('--preload', action='store_true', help="load the models before accepting requests")
+    args = parser.parse_args()
+
+    model_server = ModelServer(model_server_config['max_batch_size'], args.max_wait_ms / 1000)
+    if args.preload:
+        for name in ('chroma', 'qna', 'ocr', 'segment'):
+            try:
+                model_server.get_model(name)
+            except Exception as e:
+                print(f"Exception occured in loading model {name}: {e}")
+    model_server.serve(args.address)
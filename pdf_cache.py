@@ -0,0 +1,125 @@
+import os
+import shutil
+import sqlite3
+import hashlib
+import threading
+import time
+
+# class of a persistent, content-addressed cache of downloaded pdf files shared by the scraper and the ingester
+# (files are looked up by url, stored once per content hash and evicted least recently used first
+# when the cache grows beyond its maximum size)
+class PdfCache:
+    def __init__(self, folder, max_size_mb):
+        self.folder = os.path.abspath(folder)
+        self.objects_folder = os.path.join(self.folder, 'objects')
+        os.makedirs(self.objects_folder, exist_ok=True)
+        self.max_size = max_size_mb * 1024 * 1024
+
+        self.lock = threading.Lock()
+        # striped locks so that concurrent requests for the same url download it only once
+        self.url_locks = [threading.Lock() for _ in range(64)]
+
+        self.connection = sqlite3.connect(os.path.join(self.folder, 'index.sqlite3'), check_same_thread=False, isolation_level=None, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS objects (
+                content_hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                pdf_url TEXT NOT NULL,
+                content_hash TEXT NOT NULL REFERENCES objects (content_hash)
+            );
+            CREATE INDEX IF NOT EXISTS urls_content_hash ON urls (content_hash);
+            CREATE INDEX IF NOT EXISTS objects_last_access ON objects (last_access);
+        """)
+
+    # function to get the path of the cached file of a content hash
+    def get_object_path(self, content_hash):
+        return os.path.join(self.objects_folder, content_hash[:2], content_hash + '.pdf')
+
+    # function to look up the cached file of a url (returns the file path and the pdf url)
+    def lookup(self, url):
+        with self.lock:
+            row = self.connection.execute("SELECT pdf_url, content_hash FROM urls WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None, None
+            pdf_url, content_hash = row
+            file_path = self.get_object_path(content_hash)
+            if not os.path.exists(file_path):
+                self.connection.execute("DELETE FROM urls WHERE content_hash = ?", (content_hash,))
+                self.connection.execute("DELETE FROM objects WHERE content_hash = ?", (content_hash,))
+                return None, None
+            self.connection.execute("UPDATE objects SET last_access = ? WHERE content_hash = ?", (time.time(), content_hash))
+            return file_path, pdf_url
+
+    # function to add the content of a downloaded pdf file to the cache
+    def store(self, url, pdf_url, content):
+        content_hash = hashlib.sha256(content).hexdigest()
+        file_path = self.get_object_path(content_hash)
+        if not os.path.exists(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            temp_file_path = f'{file_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_file_path, 'wb') as f:
+                f.write(content)
+            os.replace(temp_file_path, file_path)
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO objects VALUES (?, ?, ?) ON CONFLICT (content_hash) DO UPDATE SET last_access = excluded.last_access",
+                (content_hash, len(content), time.time()))
+            self.connection.execute("INSERT OR REPLACE INTO urls VALUES (?, ?, ?)", (url, pdf_url, content_hash))
+            self.evict(keep_content_hash=content_hash)
+        return file_path, pdf_url
+
+    # function to delete the least recently used files until the cache fits in its maximum size
+    def evict(self, keep_content_hash=None):
+        total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total_size <= self.max_size:
+            return
+        for content_hash, size in self.connection.execute("SELECT content_hash, size FROM objects ORDER BY last_access").fetchall():
+            if total_size <= self.max_size:
+                break
+            if content_hash == keep_content_hash:
+                continue
+            self.connection.execute("DELETE FROM urls WHERE content_hash = ?", (content_hash,))
+            self.connection.execute("DELETE FROM objects WHERE content_hash = ?", (content_hash,))
+            try:
+                os.remove(self.get_object_path(content_hash))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    # function to get the cached file of a url, downloading it with fetch_pdf on a cache miss
+    # (fetch_pdf takes the url and returns the pdf url and the content of the pdf file;
+    # refresh downloads the file again to pick up a changed file behind the same url)
+    def get_pdf_file(self, url, fetch_pdf, refresh=False):
+        with self.url_locks[hash(url) % len(self.url_locks)]:
+            file_path, pdf_url = self.lookup(url) if not refresh else (None, None)
+            if file_path:
+                return file_path, pdf_url
+            pdf_url, content = fetch_pdf(url)
+            if not content:
+                return None, None
+            return self.store(url, pdf_url, content)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+# function to get the content hash of a cached file from its path
+def get_cached_file_hash(cached_file_path):
+    return os.path.splitext(os.path.basename(cached_file_path))[0]
+
+# function to place a copy of a cached file at another path (hard linked when possible)
+def export_cached_file(cached_file_path, file_path):
+    if os.path.exists(file_path):
+        os.remove(file_path)
+    try:
+        os.link(cached_file_path, file_path)
+    except OSError:
+        shutil.copyfile(cached_file_path, file_path)
+    return file_path
@@ -0,0 +1,41 @@
+from langchain_core.embeddings import Embeddings
+from langchain.memory import ConversationSummaryBufferMemory
+
+# langchain classes of the QnA chatbot, kept apart from document_QnA so that langchain is only imported
+# once the QnA path needs it
+
+# class to use the embedding function of a chroma collection as a langchain embedding model
+# (so that questions are embedded with the same model as the chunks stored at ingest)
+class ChromaEmbeddings(Embeddings):
+    def __init__(self, embedding_function):
+        self.embedding_function = embedding_function
+
+    def embed_documents(self, texts):
+        return [list(map(float, embedding)) for embedding in self.embedding_function(texts)]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+# function to estimate the number of tokens of chat messages (about four characters per token)
+# (an estimate, so that no tokenizer is downloaded or called on every turn)
+def estimate_num_of_tokens(messages):
+    return sum(len(message.content) for message in messages) // 4
+
+# class of the memory of the chatbot bounded by a token budget
+# (once the recent turns exceed max_token_limit, the oldest turns are folded into a running summary
+# written by the LLM until the recent turns fit in half of the budget, so that the condensed question
+# prompt stays bounded and a summary is written only every few turns; turns are folded as whole
+# question and answer pairs so that the recent turns never start with an answer)
+class BoundedSummaryMemory(ConversationSummaryBufferMemory):
+    # number of turns folded into the summary so far
+    num_of_summarized_turns: int = 0
+
+    def prune(self):
+        buffer = self.chat_memory.messages
+        if estimate_num_of_tokens(buffer) > self.max_token_limit:
+            pruned_memory = []
+            while buffer and estimate_num_of_tokens(buffer) > self.max_token_limit // 2:
+                pruned_memory += buffer[:2]
+                del buffer[:2]
+                self.num_of_summarized_turns += 1
+            self.moving_summary_buffer = self.predict_new_summary(pruned_memory, self.moving_summary_buffer)
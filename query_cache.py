@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# class of an in-memory cache of search results keyed by the normalized query
+# (entries expire after a time to live, the least recently used entry is evicted when the cache is full,
+# and all entries are dropped when the version of the searched collections changes)
+class QueryCache:
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # function to create the cache key of a query (case and whitespace are ignored)
+    @staticmethod
+    def create_key(query, *params):
+        return (' '.join(query.lower().split()),) + params
+
+    # function to drop all entries if the searched collections changed since they were cached
+    def check_version(self, version):
+        if version != self.version:
+            self.entries.clear()
+            self.version = version
+
+    # function to get the cached results of a key (returns None on a miss)
+    def get(self, key, version):
+        with self.lock:
+            self.check_version(version)
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    # function to cache the results of a key
+    def put(self, key, version, value):
+        with self.lock:
+            self.check_version(version)
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    # function to drop all entries
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+
+    # function to get the hit and miss counters of the cache
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0, 'entries': len(self.entries)}
+
+# function to get the version of a set of collections stored in a chromadb folder
+# (the number of records of each collection and the modification time of the database file,
+# so that any add, update or delete made by the ingester changes the version)
+def get_collection_version(collections, database_path):
+    version = tuple(collection.count() if collection is not None else 0 for collection in collections)
+    for filename in ('chroma.sqlite3', 'chroma.sqlite3-wal'):
+        try:
+            version += (os.stat(os.path.join(database_path, filename)).st_mtime_ns,)
+        except FileNotFoundError:
+            version += (0,)
+    return version
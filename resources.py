@@ -0,0 +1,168 @@
+import os
+import json
+
+import streamlit as st
+import chromadb
+
+from document_QnA import create_embedding_model, create_chunk_vector_store
+from query_cache import QueryCache, get_collection_version
+from keyword_index import load_or_create_keyword_index
+import model_server
+
+def load_config(filename):
+    with open(filename, 'r') as f:
+        config = json.load(f)
+    return config
+
+config = load_config('config.json')
+db_name = config['database']['chromadb']['database_name']
+chunk_collection_name = config['database']['chromadb']['chunk_collection_name']
+search_config = config['search']
+qna_config = config['qna']
+snapshot_config = config['serving_snapshot']
+
+# Get the absolute path of the current working directory
+current_directory = os.getcwd()
+database_path = f'{current_directory}/data'
+
+# resources below are created once per server process and shared by every session and rerun
+# (the compact index and the serving snapshot modules, which load faiss, are imported when they are enabled)
+
+# function to get the chromadb client
+@st.cache_resource
+def get_chroma_client():
+    return chromadb.PersistentClient(path=database_path)
+
+# function to get the embedding function of the document collection
+# (served by the model server when it is running, so that sessions share a single copy of the model)
+@st.cache_resource
+def get_collection_embedding_function():
+    return model_server.get_collection_embedding_function()
+
+# function to load a serving snapshot (loaded again only when another snapshot is published; the previous one
+# is dropped once the requests using it are done)
+@st.cache_resource(max_entries=1)
+def load_serving_snapshot(name):
+    from serving_snapshot import ServingSnapshot
+    return ServingSnapshot(os.path.join(snapshot_config['folder'], name), get_collection_embedding_function())
+
+# function to get the serving snapshot currently published (None when snapshots are disabled or none is published)
+def get_serving_snapshot():
+    if not snapshot_config['enabled']:
+        return None
+    from serving_snapshot import get_current_snapshot_name
+    name = get_current_snapshot_name(snapshot_config['folder'])
+    return load_serving_snapshot(name) if name else None
+
+# function to get the document collection of chromadb
+@st.cache_resource
+def get_chroma_doc_collection():
+    return get_chroma_client().get_collection(name=db_name, embedding_function=get_collection_embedding_function())
+
+# function to get the document collection searched: the one of the serving snapshot if there is one
+def get_doc_collection():
+    snapshot = get_serving_snapshot()
+    return snapshot.doc_collection if snapshot else get_chroma_doc_collection()
+
+# function to get the chunk collection
+@st.cache_resource
+def get_chunk_collection():
+    return get_chroma_client().get_or_create_collection(name=chunk_collection_name, embedding_function=get_collection_embedding_function())
+
+# function to get the vector store over the chunk collection used by the QnA retriever
+@st.cache_resource
+def get_chunk_vector_store():
+    return create_chunk_vector_store(get_chroma_client(), get_collection_embedding_function())
+
+# function to get the embedding model of the QnA vector stores
+@st.cache_resource
+def get_qna_embedding_model():
+    return create_embedding_model()
+
+# function to get the cache of search results shared by all sessions
+@st.cache_resource
+def get_query_cache():
+    return QueryCache(search_config['query_cache_max_entries'], search_config['query_cache_ttl_seconds'])
+
+# function to get the modification time of the keyword index file (changes when the ingester saves the index)
+def get_keyword_index_version():
+    try:
+        return os.stat(search_config['keyword_index_path']).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+# function to load the keyword index (loaded again only when the index file changes)
+@st.cache_resource(max_entries=1)
+def load_keyword_index(version):
+    return load_or_create_keyword_index(search_config['keyword_index_path'])
+
+# function to get the current keyword index (the one of the serving snapshot if there is one)
+def get_keyword_index():
+    snapshot = get_serving_snapshot()
+    return snapshot.keyword_index if snapshot else load_keyword_index(get_keyword_index_version())
+
+# function to get the modification time of the compact index (changes when the index is built again)
+def get_compact_index_version():
+    try:
+        return os.stat(os.path.join(search_config['compact_index']['path'], 'index.faiss')).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+# function to load the compact index (loaded again only when the index is built again)
+@st.cache_resource(max_entries=1)
+def load_compact_index(version):
+    from compact_index import CompactIndex
+    return CompactIndex.load(search_config['compact_index']['path'], get_chunk_collection(), get_collection_embedding_function())
+
+# function to check if the compact index was built from the current version of the chunk collection
+# (checked once per version of the index and of the collection, so that a stale index is reported only once)
+@st.cache_data(max_entries=1)
+def is_compact_index_current(version, collection_version):
+    if load_compact_index(version).collection_version == collection_version:
+        return True
+    print("Compact index is out of date, searching the chunk collection until it is built again...")
+    return False
+
+# function to get the collection searched for similar chunks: the chunk index of the serving snapshot if there
+# is one, the compact index when it is enabled and was built from the current chunk collection, otherwise the
+# chunk collection itself (any write of the ingester changes the version of the collection)
+def get_search_collection():
+    snapshot = get_serving_snapshot()
+    if snapshot:
+        return snapshot.chunk_index
+    chunk_collection = get_chunk_collection()
+    version = get_compact_index_version()
+    if search_config['compact_index']['enabled'] and version:
+        if is_compact_index_current(version, get_collection_version([chunk_collection], database_path)):
+            return load_compact_index(version)
+    return chunk_collection
+
+# function to get the version of the data searched (changes whenever a search may give other results)
+def get_search_version():
+    snapshot = get_serving_snapshot()
+    if snapshot:
+        return (snapshot.name,)
+    return get_collection_version([get_doc_collection(), get_chunk_collection()], database_path) + (get_keyword_index_version(), get_compact_index_version())
+
+# function to get the case titles and document ids of all cases
+# (only the metadata is fetched, and it is fetched again only when the number of documents changes)
+@st.cache_data
+def get_dict_of_options(num_of_documents):
+    all_documents = get_doc_collection().get(include=['metadatas'])
+    list_of_case_titles = [dictionary['case_title'] for dictionary in all_documents['metadatas']]
+    list_of_doc_ids = all_documents['ids']
+    return {list_of_case_titles[num]:list_of_doc_ids[num] for num in range(len(list_of_case_titles))}
+
+# function to get the values offered by the search filters (case types, statuses, benches, judges and filing years)
+# (fetched again only when the number of documents changes)
+@st.cache_data
+def get_filter_options(num_of_documents):
+    all_documents = get_doc_collection().get(include=['metadatas'])
+    filter_options = {'case_type': set(), 'case_status': set(), 'bench': set(), 'judge': set(), 'filing_year': set()}
+    for metadata in all_documents['metadatas']:
+        for key in ('case_type', 'case_status', 'bench', 'filing_year'):
+            if metadata.get(key):
+                filter_options[key].add(metadata[key])
+        if metadata.get('judges'):
+            filter_options['judge'].update(metadata['judges'].split('; '))
+    return {key: sorted(values) for key, values in filter_options.items()}
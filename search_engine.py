@@ -0,0 +1,103 @@
+import json
+
+from case_metadata import create_where_clause
+
+def load_config(filename):
+    with open(filename, 'r') as f:
+        config = json.load(f)
+    return config
+
+config = load_config('config.json')
+search_config = config['search']
+
+# function to turn the distance of a chunk hit into a similarity score (higher is better)
+def get_similarity_from_distance(distance):
+    return 1.0 / (1.0 + distance)
+
+# function to aggregate chunk hits into case scores with max or sum scoring
+# (returns a list of case id and score, best first)
+def aggregate_chunk_hits(chunk_metadatas, chunk_distances, scoring='max'):
+    case_scores = {}
+    for metadata, distance in zip(chunk_metadatas, chunk_distances):
+        case_id = metadata['case_id']
+        similarity = get_similarity_from_distance(distance)
+        if scoring == 'sum':
+            case_scores[case_id] = case_scores.get(case_id, 0.0) + similarity
+        else:
+            case_scores[case_id] = max(case_scores.get(case_id, 0.0), similarity)
+    return sorted(case_scores.items(), key=lambda item: item[1], reverse=True)
+
+# function to fuse ranked lists of case ids with reciprocal rank fusion
+# (returns a list of case id and score, best first)
+def fuse_rankings(rankings, rrf_k=60):
+    case_scores = {}
+    for ranking in rankings:
+        for rank, case_id in enumerate(ranking):
+            case_scores[case_id] = case_scores.get(case_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+    return sorted(case_scores.items(), key=lambda item: item[1], reverse=True)
+
+# function to get the metadata of a ranked list of cases in the result format of search_cases
+def get_case_results(doc_collection, case_scores):
+    list_of_doc_ids = [case_id for case_id, score in case_scores]
+    cases = doc_collection.get(ids=list_of_doc_ids, include=['metadatas']) if list_of_doc_ids else {'ids': [], 'metadatas': []}
+    metadata_by_id = dict(zip(cases['ids'], cases['metadatas']))
+    case_scores = [(case_id, score) for case_id, score in case_scores if case_id in metadata_by_id]
+    return {
+        'ids': [case_id for case_id, score in case_scores],
+        'metadatas': [metadata_by_id[case_id] for case_id, score in case_scores],
+        'scores': [score for case_id, score in case_scores],
+    }
+
+# function to rank the cases matching a query by vector similarity
+# (chunks are searched and their hits aggregated back to cases; collections without chunks
+# are searched one document per case; the filters are applied by chromadb before scoring;
+# returns a list of case id and score, best first)
+def rank_cases_by_similarity(doc_collection, chunk_collection, query, n_results=10, scoring=None, filters=None):
+    scoring = scoring or search_config['chunk_scoring']
+    where = create_where_clause(filters)
+    if chunk_collection is None or chunk_collection.count() == 0:
+        result = doc_collection.query(query_texts=query, n_results=min(n_results, doc_collection.count()), where=where, include=['distances'])
+        return [(doc_id, get_similarity_from_distance(distance)) for doc_id, distance in zip(result['ids'][0], result['distances'][0])]
+
+    num_of_chunks = min(n_results * search_config['chunk_overfetch'], chunk_collection.count())
+    chunk_result = chunk_collection.query(query_texts=query, n_results=num_of_chunks, where=where, include=['metadatas', 'distances'])
+    return aggregate_chunk_hits(chunk_result['metadatas'][0], chunk_result['distances'][0], scoring)[:n_results]
+
+# function to search the cases matching a query
+# (filters is a dictionary of field and value described in case_metadata.create_where_clause)
+def search_cases(doc_collection, chunk_collection, query, n_results=10, scoring=None, filters=None):
+    try:
+        return get_case_results(doc_collection, rank_cases_by_similarity(doc_collection, chunk_collection, query, n_results, scoring, filters))
+
+    except Exception as e:
+        print(f"Exception occured in search_cases: {e}")
+        return None
+
+# function to search the cases matching a query with both keyword and vector search
+# (a query that is a CNR number, CI number or case number is answered from the keyword index alone;
+# otherwise the BM25 and vector rankings are fused with reciprocal rank fusion)
+def hybrid_search_cases(doc_collection, chunk_collection, keyword_index, query, n_results=10, scoring=None, filters=None):
+    try:
+        if keyword_index is None or keyword_index.count() == 0:
+            return search_cases(doc_collection, chunk_collection, query, n_results, scoring, filters)
+
+        # the keyword index holds no metadata, so its hits are restricted to the cases passing the filters
+        where = create_where_clause(filters)
+        allowed_doc_ids = set(doc_collection.get(where=where, include=[])['ids']) if where else None
+        def is_allowed(doc_id):
+            return allowed_doc_ids is None or doc_id in allowed_doc_ids
+
+        list_of_doc_ids = [doc_id for doc_id in keyword_index.lookup_identifier(query) if is_allowed(doc_id)]
+        if list_of_doc_ids:
+            return get_case_results(doc_collection, [(doc_id, 1.0) for doc_id in list_of_doc_ids[:n_results]])
+
+        num_of_candidates = max(n_results, search_config['hybrid_candidates'])
+        keyword_hits = keyword_index.search(query, num_of_candidates if allowed_doc_ids is None else keyword_index.count())
+        keyword_ranking = [case_id for case_id, score in keyword_hits if is_allowed(case_id)][:num_of_candidates]
+        vector_ranking = [case_id for case_id, score in rank_cases_by_similarity(doc_collection, chunk_collection, query, num_of_candidates, scoring, filters)]
+        case_scores = fuse_rankings([keyword_ranking, vector_ranking], search_config['rrf_k'])[:n_results]
+        return get_case_results(doc_collection, case_scores)
+
+    except Exception as e:
+        print(f"Exception occured in hybrid_search_cases: {e}")
+        return None
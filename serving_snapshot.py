@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import shutil
+import argparse
+
+import numpy as np
+import chromadb
+
+from string_table import StringTable, StringTableWriter
+from compact_index import CompactIndex, build_compact_index, compact_index_config
+from keyword_index import KeywordIndex
+from case_metadata import get_judge_key
+
+def load_config(filename):
+    with open(filename, 'r') as f:
+        config = json.load(f)
+    return config
+
+config = load_config('config.json')
+db_name = config['database']['chromadb']['database_name']
+chunk_collection_name = config['database']['chromadb']['chunk_collection_name']
+keyword_index_path = config['search']['keyword_index_path']
+snapshot_config = config['serving_snapshot']
+
+# metadata fields of the cases stored as columns of the snapshot so that filters are evaluated without chromadb
+category_fields = ('case_type', 'case_status', 'bench')
+year_fields = ('filing_year', 'registration_year', 'judgement_year')
+
+# name of the file holding the name of the snapshot served (replaced atomically when a snapshot is published)
+current_snapshot_filename = 'CURRENT'
+
+# class of the read-only document collection of a snapshot, queried like the chroma document collection
+# (ids, documents and metadata are memory-mapped string tables, the filter fields are columns of codes and years)
+class SnapshotDocCollection:
+    def __init__(self, folder):
+        self.ids = StringTable(os.path.join(folder, 'ids'))
+        self.documents = StringTable(os.path.join(folder, 'documents'))
+        self.metadatas = StringTable(os.path.join(folder, 'metadatas'))
+        with open(os.path.join(folder, 'columns.json'), 'r') as f:
+            self.vocabularies = json.load(f)
+        self.columns = {field: np.load(os.path.join(folder, f'{field}.npy'), mmap_mode='r') for field in category_fields + year_fields}
+        self.judge_offsets = np.load(os.path.join(folder, 'judge_offsets.npy'), mmap_mode='r')
+        self.judge_doc_numbers = np.load(os.path.join(folder, 'judge_doc_numbers.npy'), mmap_mode='r')
+        self.doc_numbers = None
+
+    def count(self):
+        return len(self.ids)
+
+    # function to get the number of a document from its id (the lookup table is built on first use)
+    def get_doc_number(self, doc_id):
+        if self.doc_numbers is None:
+            self.doc_numbers = {doc_id: doc_number for doc_number, doc_id in enumerate(self.ids)}
+        return self.doc_numbers.get(doc_id)
+
+    # function to get the mask of the documents matching a condition on a field
+    def get_field_mask(self, key, condition):
+        operator, value = next(iter(condition.items())) if isinstance(condition, dict) else ('$eq', condition)
+        if key.startswith('judge_') and key != 'judges':
+            mask = np.zeros(self.count(), dtype=bool)
+            judge_number = self.vocabularies['judge'].get(key)
+            if judge_number is not None:
+                mask[self.judge_doc_numbers[self.judge_offsets[judge_number]:self.judge_offsets[judge_number + 1]]] = True
+            if (operator, value) in (('$eq', True), ('$ne', False)):
+                return mask
+            if (operator, value) in (('$eq', False), ('$ne', True)):
+                return ~mask
+        elif key in category_fields:
+            codes = self.columns[key]
+            vocabulary = self.vocabularies[key]
+            if operator in ('$eq', '$ne'):
+                mask = codes == vocabulary.get(value, -2)
+                return mask if operator == '$eq' else ~mask
+            if operator in ('$in', '$nin'):
+                mask = np.isin(codes, [vocabulary.get(item, -2) for item in value])
+                return mask if operator == '$in' else ~mask
+        elif key in year_fields:
+            years = self.columns[key]
+            known = years != 0
+            if operator == '$in':
+                return known & np.isin(years, value)
+            comparisons = {'$eq': np.equal, '$ne': np.not_equal, '$gt': np.greater, '$gte': np.greater_equal, '$lt': np.less, '$lte': np.less_equal}
+            if operator in comparisons:
+                return known & comparisons[operator](years, value)
+        raise ValueError(f"filter not supported by the serving snapshot: {key} {condition}")
+
+    # function to get the mask of the documents matching a chroma where clause
+    def get_mask(self, where):
+        if not where:
+            return np.ones(self.count(), dtype=bool)
+        if '$and' in where:
+            return np.logical_and.reduce([self.get_mask(condition) for condition in where['$and']] + [np.ones(self.count(), dtype=bool)])
+        if '$or' in where:
+            return np.logical_or.reduce([self.get_mask(condition) for condition in where['$or']] + [np.zeros(self.count(), dtype=bool)])
+        return np.logical_and.reduce([self.get_field_mask(key, condition) for key, condition in where.items()] + [np.ones(self.count(), dtype=bool)])
+
+    # function to get documents like chroma (by ids or by a where clause, with their metadatas and documents)
+    def get(self, ids=None, where=None, include=('metadatas', 'documents'), offset=None, limit=None):
+        if ids is not None:
+            doc_numbers = [doc_number for doc_number in map(self.get_doc_number, ids) if doc_number is not None]
+        else:
+            doc_numbers = np.flatnonzero(self.get_mask(where)).tolist()
+        doc_numbers = doc_numbers[offset or 0:(offset or 0) + limit if limit else None]
+        result = {'ids': [self.ids[doc_number] for doc_number in doc_numbers], 'metadatas': None, 'documents': None}
+        if 'metadatas' in include:
+            result['metadatas'] = [json.loads(self.metadatas[doc_number]) for doc_number in doc_numbers]
+        if 'documents' in include:
+            result['documents'] = [self.documents[doc_number] for doc_number in doc_numbers]
+        return result
+
+# class of the compact chunk index of a snapshot (filters are evaluated on the document columns of the snapshot)
+class SnapshotChunkIndex(CompactIndex):
+    def __init__(self, *args, doc_collection=None, chunk_doc_numbers=None):
+        super().__init__(*args)
+        self.doc_collection = doc_collection
+        self.chunk_doc_numbers = chunk_doc_numbers
+
+    def get_chunk_numbers(self, where):
+        # chunks of cases missing from the document collection have the number -1, which picks the appended False
+        mask = np.append(self.doc_collection.get_mask(where), False)
+        return np.flatnonzero(mask[self.chunk_doc_numbers])
+
+# class of a serving snapshot: the documents, the compact chunk index and the keyword index frozen by an export
+# (opening a snapshot maps its files instead of reading them, so processes share the pages and start quickly)
+class ServingSnapshot:
+    def __init__(self, folder, embedding_function):
+        self.name = os.path.basename(folder)
+        self.doc_collection = SnapshotDocCollection(os.path.join(folder, 'docs'))
+        compact_index = CompactIndex.load(os.path.join(folder, 'chunks'), None, embedding_function)
+        self.chunk_index = SnapshotChunkIndex(compact_index.index, compact_index.vectors, compact_index.chunk_ids, compact_index.case_ids, None,
+                                              embedding_function, compact_index.nprobe, compact_index.rerank_factor,
+                                              doc_collection=self.doc_collection, chunk_doc_numbers=np.load(os.path.join(folder, 'chunks', 'chunk_doc_numbers.npy'), mmap_mode='r'))
+        keyword_index_file = os.path.join(folder, 'keyword_index.pkl')
+        self.keyword_index = KeywordIndex.load(keyword_index_file) if os.path.exists(keyword_index_file) else KeywordIndex()
+
+# function to get the name of the snapshot currently published in a folder (None if there is none)
+def get_current_snapshot_name(snapshots_folder):
+    try:
+        with open(os.path.join(snapshots_folder, current_snapshot_filename), 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+# function to write the documents of the document collection to the docs folder of a snapshot
+# (returns the doc ids in the order they were written)
+def export_documents(doc_collection, folder, batch_size):
+    os.makedirs(folder)
+    writers = {name: StringTableWriter(os.path.join(folder, name)) for name in ('ids', 'documents', 'metadatas')}
+    vocabularies = {field: {} for field in category_fields + ('judge',)}
+    columns = {field: [] for field in category_fields + year_fields}
+    judge_doc_numbers = {}
+    list_of_doc_ids = []
+
+    num_of_documents = doc_collection.count()
+    for offset in range(0, num_of_documents, batch_size):
+        result = doc_collection.get(offset=offset, limit=batch_size, include=['documents', 'metadatas'])
+        for doc_id, document, metadata in zip(result['ids'], result['documents'], result['metadatas']):
+            doc_number = len(list_of_doc_ids)
+            list_of_doc_ids.append(doc_id)
+            writers['ids'].append(doc_id)
+            writers['documents'].append(document or '')
+            writers['metadatas'].append(json.dumps(metadata, ensure_ascii=False))
+            for field in category_fields:
+                value = metadata.get(field)
+                columns[field].append(-1 if value is None else vocabularies[field].setdefault(value, len(vocabularies[field])))
+            for field in year_fields:
+                columns[field].append(metadata.get(field) or 0)
+            for judge in (metadata.get('judges') or '').split('; '):
+                if judge:
+                    judge_number = vocabularies['judge'].setdefault(get_judge_key(judge), len(vocabularies['judge']))
+                    judge_doc_numbers.setdefault(judge_number, []).append(doc_number)
+
+    for writer in writers.values():
+        writer.close()
+    for field in category_fields + year_fields:
+        np.save(os.path.join(folder, f'{field}.npy'), np.asarray(columns[field], dtype=np.int32))
+    judge_lists = [judge_doc_numbers[judge_number] for judge_number in range(len(vocabularies['judge']))]
+    np.save(os.path.join(folder, 'judge_offsets.npy'), np.cumsum([0] + [len(doc_numbers) for doc_numbers in judge_lists], dtype=np.int64))
+    np.save(os.path.join(folder, 'judge_doc_numbers.npy'), np.asarray([doc_number for doc_numbers in judge_lists for doc_number in doc_numbers], dtype=np.int64))
+    with open(os.path.join(folder, 'columns.json'), 'w') as f:
+        json.dump(vocabularies, f)
+    return list_of_doc_ids
+
+# function to export the collections and the keyword index to a new snapshot and publish it
+# (the snapshot is written under a temporary name, renamed, and then made current by replacing the CURRENT
+# file, so that serving processes switch to it on their next request; older snapshots beyond keep are removed)
+def export_snapshot(doc_collection, chunk_collection, snapshots_folder, index_type=None, batch_size=1000, keep=None):
+    try:
+        if not chunk_collection.count():
+            print("No chunks to export, ingest or backfill the chunks first...")
+            return None
+        os.makedirs(snapshots_folder, exist_ok=True)
+        name = time.strftime('%Y%m%d-%H%M%S') + f'-{os.getpid()}'
+        temp_folder = os.path.join(snapshots_folder, f'.{name}.tmp')
+        os.makedirs(temp_folder)
+        start_time = time.perf_counter()
+
+        list_of_doc_ids = export_documents(doc_collection, os.path.join(temp_folder, 'docs'), batch_size)
+        index_description = build_compact_index(chunk_collection, os.path.join(temp_folder, 'chunks'), index_type, batch_size)
+        if index_description is None:
+            raise RuntimeError("the compact chunk index could not be built")
+        doc_numbers = {doc_id: doc_number for doc_number, doc_id in enumerate(list_of_doc_ids)}
+        case_ids = StringTable(os.path.join(temp_folder, 'chunks', 'case_ids'))
+        np.save(os.path.join(temp_folder, 'chunks', 'chunk_doc_numbers.npy'), np.asarray([doc_numbers.get(case_id, -1) for case_id in case_ids], dtype=np.int64))
+        if os.path.exists(keyword_index_path):
+            shutil.copyfile(keyword_index_path, os.path.join(temp_folder, 'keyword_index.pkl'))
+        with open(os.path.join(temp_folder, 'manifest.json'), 'w') as f:
+            json.dump({'name': name, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'num_of_documents': len(list_of_doc_ids),
+                       'num_of_chunks': len(case_ids), 'chunk_index': index_description}, f, indent=4)
+
+        os.replace(temp_folder, os.path.join(snapshots_folder, name))
+        temp_current_file = os.path.join(snapshots_folder, f'.{current_snapshot_filename}.{os.getpid()}.tmp')
+        with open(temp_current_file, 'w') as f:
+            f.write(name)
+        os.replace(temp_current_file, os.path.join(snapshots_folder, current_snapshot_filename))
+        print(f"Snapshot {name} of {len(list_of_doc_ids)} documents and {len(case_ids)} chunks published in {time.perf_counter() - start_time:.2f} s")
+
+        # serving processes may still map the previous snapshots for a moment, the oldest ones are removed
+        # (mapped pages stay valid after their files are removed)
+        keep = keep or snapshot_config['keep']
+        snapshot_names = sorted(entry for entry in os.listdir(snapshots_folder) if not entry.startswith('.') and entry != current_snapshot_filename)
+        for old_name in snapshot_names[:-keep]:
+            if old_name != name:
+                shutil.rmtree(os.path.join(snapshots_folder, old_name), ignore_errors=True)
+        return name
+
+    except Exception as e:
+        print(f"Exception occured in export_snapshot: {e}")
+        return None
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the collections and the keyword index to a read-only serving snapshot and publish it.")
+    parser.add_argument('--index-type', choices=['ivfpq', 'sq8'], default=compact_index_config['index_type'], help="quantization of the chunk index")
+    parser.add_argument('--batch-size', type=int, default=1000, help="number of documents or chunks read from the collections at a time")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path="data")
+    export_snapshot(client.get_collection(name=db_name), client.get_collection(name=chunk_collection_name), snapshot_config['folder'], args.index_type, args.batch_size)
@@ -0,0 +1,41 @@
+import numpy as np
+
+# class to write a list of strings as a flat table: the utf-8 bytes of the strings back to back in
+# path.bin and the offset of every string in path.offsets.npy (so that readers can memory-map it)
+class StringTableWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(f'{path}.bin', 'wb')
+        self.offsets = [0]
+
+    def append(self, string):
+        data = string.encode('utf-8')
+        self.file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def close(self):
+        self.file.close()
+        np.save(f'{self.path}.offsets.npy', np.asarray(self.offsets, dtype=np.int64))
+
+# function to write a list of strings as a flat table
+def write_string_table(strings, path):
+    writer = StringTableWriter(path)
+    for string in strings:
+        writer.append(string)
+    writer.close()
+
+# class of a memory-mapped string table (strings are decoded when they are read; the pages of the
+# table are shared by every process reading it)
+class StringTable:
+    def __init__(self, path):
+        self.offsets = np.load(f'{path}.offsets.npy', mmap_mode='r')
+        self.data = np.memmap(f'{path}.bin', dtype=np.uint8, mode='r') if self.offsets[-1] else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))